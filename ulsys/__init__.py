@@ -1 +1,26 @@
-from .lsys import *
+from ._lazy import lazyModule
+
+# Nothing is imported until it is used, so that "import ulsys" is quick; in
+# particular the turtles and NumPy aren't loaded by programs that don't use
+# them.
+__all__ = [
+    "TurtleAction", 
+    "pythagorasTree", 
+    "kochFlake", 
+    "triKochFlake",
+    "fractalPlant",
+    "FunctionalSymbol"
+]
+
+__getattr__, __dir__ = lazyModule(__name__, {
+    "lsys": __all__,
+    "standard": [],
+    "stochastic": [],
+    "turtle": [],
+    "stats": [],
+    "bench": [],
+    "lod": [],
+    "cache": [],
+    "instancing": [],
+    "pipeline": []
+})
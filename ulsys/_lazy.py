@@ -0,0 +1,76 @@
+"""
+ulsys lazy imports.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import importlib
+import sys
+
+def lazyModule(package, modules):
+    """Makes the submodules of package load on first use.
+    
+    package is the package's __name__ and modules a dictionary mapping each
+    lazily loaded submodule to the names it exports. Returns __getattr__ and
+    __dir__ functions for the package's namespace, see PEP 562. Looking up a
+    name imports its submodule and stores the name in the package, so later
+    lookups don't come back here. A submodule without the name raises 
+    AttributeError, as if it had never been there.
+    """
+    owners = {name: m for m, names in modules.items() for name in names}
+    
+    def __getattr__(name):
+        if name in modules:
+            return importlib.import_module("." + name, package)
+        if name not in owners:
+            raise AttributeError("module {!r} has no attribute {!r}".format(
+                package, name))
+        module = importlib.import_module("." + owners[name], package)
+        value = getattr(module, name)
+        setattr(sys.modules[package], name, value)
+        return value
+    
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(owners) | 
+                      set(modules))
+    
+    return __getattr__, __dir__
+
+_optional = {}
+
+def optionalImport(name):
+    """Imports module name on first use, returning None if it isn't 
+    installed. The outcome is remembered, so a missing module is only looked
+    for once."""
+    try:
+        return _optional[name]
+    except KeyError:
+        pass
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        module = None
+    _optional[name] = module
+    return module
@@ -0,0 +1,316 @@
+"""
+ulsys benchmark suite.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+from . import lsys, standard, stochastic, turtle
+from .standard.standard import _ruleDict
+
+__all__ = [
+    "SYSTEMS",
+    "STARTUP",
+    "STARTUP_RUNS",
+    "measureImport",
+    "runBenchmarks",
+    "compareResults",
+    "main"
+]
+
+SYSTEMS = ["pythagorasTree", "kochFlake", "triKochFlake", "fractalPlant"]
+# Modules whose import time is measured, see measureImport().
+STARTUP = ["ulsys", "ulsys.standard", "ulsys.turtle"]
+# Code timed like the imports, from a fresh process, as benchmark "run <name>".
+STARTUP_RUNS = {
+    # Rewriting strings shouldn't load NumPy.
+    "standard.evaluateSystem": 
+        "import ulsys.standard\n"
+        "ulsys.standard.evaluateSystem('F', "
+        "ulsys.standard.production('F->F-F++F-F'), 3)"
+}
+
+_IMPORT = """
+import sys, time, tracemalloc
+if sys.argv[1] == "memory":
+    tracemalloc.start()
+start = time.perf_counter()
+{}
+print(time.perf_counter() - start, tracemalloc.get_traced_memory()[1])
+"""
+
+def _stochasticRules(rules):
+    """Turns standard rules into stochastic ones with probability 1."""
+    return [(S, 1.0, Abc) for S, Abc in _ruleDict(rules).items()]
+
+def _turtleBackends():
+    """Lists (name, factory) for each turtle backend that can be created. 
+    A factory returns a turtle and a function to call when done with it."""
+    backends = [("ArrayTurtle", lambda: (turtle.ArrayTurtle(), None))]
+    def svg():
+        f = open(os.devnull, "wb")
+        t = turtle.SVGTurtle(f)
+        return t, lambda: (t.close(), f.close())
+    backends.append(("SVGTurtle", svg))
+    if hasattr(turtle, "PyXTurtle"):
+        backends.append(("PyXTurtle", lambda: (turtle.PyXTurtle(), None)))
+    return backends
+
+def _cases(system, n):
+    """Yields (benchmark, f) for every benchmark of a built-in system at 
+    generation n. f runs the benchmark and returns the size of its output."""
+    f = getattr(lsys, system)
+    axiom = f.__defaults__[0]
+    rules = f.rules
+    actions = f.turtleActions
+    stochasticRules = _stochasticRules(rules)
+    
+    yield "standard.evaluateSystem", lambda: len(
+        standard.evaluateSystem(axiom, rules, n))
+    yield "stochastic.evaluateSystem", lambda: len(
+        stochastic.evaluateSystem(axiom, stochasticRules, n, seed=0))
+    
+    symbols = standard.evaluateSystem(axiom, rules, n)
+    for name, factory in _turtleBackends():
+        def draw(factory=factory):
+            t, done = factory()
+            turtle.mapActions(symbols, actions, t)
+            if done is not None:
+                done()
+            return len(symbols)
+        yield "mapActions." + name, draw
+    if turtle.segments.numpy is not None:
+        yield "segmentArray", lambda: len(turtle.segmentArray(symbols, actions))
+
+def _measure(f, repeat):
+    """Returns the best time of repeat runs of f, the peak number of bytes
+    traced during one more run, and f's result."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        size = f()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        f()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak, size
+
+def measureImport(module, repeat=3, code=None):
+    """Returns the best time of repeat imports of module, each in a new 
+    Python process, and the peak number of bytes traced during one more. 
+    The time of starting Python itself is not included. If code is given 
+    it is run instead of the import."""
+    if code is None:
+        code = "import " + module
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        [root] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+    def run(mode):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT.format(code), mode], env=env,
+            stdout=subprocess.PIPE, check=True, universal_newlines=True)
+        seconds, peak = output.stdout.split()
+        return float(seconds), int(peak)
+    best = min(run("time")[0] for _ in range(repeat))
+    return best, run("memory")[1]
+
+def runBenchmarks(systems=SYSTEMS, budget=200000, repeat=3, 
+                  benchmarks=None, log=None):
+    """Times and memory-profiles the evaluators and turtles on the built-in
+    systems.
+    
+    For each system n is swept from 1 upwards, as long as generation n has
+    at most budget symbols (computed with systemLength(), without evaluating
+    anything). benchmarks optionally restricts which benchmarks run, by 
+    name. log, if given, is called with each result as it is measured.
+    
+    The import of each module in STARTUP is timed too, as benchmark 
+    "import <module>" with system "startup" and n 0, and so is the code in
+    STARTUP_RUNS.
+    
+    Returns a dictionary that can be written as JSON, with a list of results
+    of the form {"benchmark", "system", "n", "seconds", "peakBytes", 
+    "symbols"}.
+    """
+    results = []
+    def record(result):
+        results.append(result)
+        if log is not None:
+            log(result)
+    
+    startup = [("import " + module, module, None) for module in STARTUP]
+    startup += [("run " + name, None, code) 
+                for name, code in STARTUP_RUNS.items()]
+    for benchmark, module, code in startup:
+        if benchmarks and benchmark not in benchmarks:
+            continue
+        seconds, peak = measureImport(module, repeat, code)
+        record({
+            "benchmark": benchmark,
+            "system": "startup",
+            "n": 0,
+            "seconds": seconds,
+            "peakBytes": peak,
+            "symbols": 0
+        })
+    
+    for system in systems:
+        f = getattr(lsys, system)
+        n = 1
+        while standard.systemLength(f.__defaults__[0], f.rules, n) <= budget:
+            for benchmark, case in _cases(system, n):
+                if benchmarks and benchmark not in benchmarks:
+                    continue
+                seconds, peak, size = _measure(case, repeat)
+                record({
+                    "benchmark": benchmark,
+                    "system": system,
+                    "n": n,
+                    "seconds": seconds,
+                    "peakBytes": peak,
+                    "symbols": size
+                })
+            n += 1
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "budget": budget,
+        "repeat": repeat,
+        "results": results
+    }
+
+def _change(old, new):
+    """Describes the increase from old to new, as a percentage if it can."""
+    if old <= 0:
+        return "up from zero"
+    return "+{:.0%}".format(new / old - 1)
+
+def compareResults(baseline, current, tolerance=0.25, minSeconds=1e-3):
+    """Compares two runs of runBenchmarks(), returning a list of messages 
+    describing each regression.
+    
+    A result regresses if it is more than tolerance (a fraction) slower, or 
+    uses more than tolerance more memory, than the baseline result for the
+    same benchmark, system and n. Timings where both runs are below 
+    minSeconds are too noisy to compare and are skipped.
+    
+        >>> old = {"results": [{"benchmark": "b", "system": "s", "n": 1, 
+        ...                     "seconds": 1.0, "peakBytes": 100}]}
+        >>> new = {"results": [{"benchmark": "b", "system": "s", "n": 1, 
+        ...                     "seconds": 1.5, "peakBytes": 100}]}
+        >>> compareResults(old, new)
+        ['b s n=1: time 1.000s -> 1.500s (+50%)']
+        >>> compareResults(new, old)
+        []
+        >>> old["results"][0]["peakBytes"] = 0
+        >>> compareResults(old, old)
+        []
+        >>> compareResults(old, new)
+        ['b s n=1: time 1.000s -> 1.500s (+50%)', 'b s n=1: memory 0 -> 100 bytes (up from zero)']
+    """
+    def key(r):
+        return r["benchmark"], r["system"], r["n"]
+    
+    before = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        name = "{} {} n={}".format(*key(r))
+        if max(r["seconds"], old["seconds"]) >= minSeconds and (
+                r["seconds"] > old["seconds"] * (1 + tolerance)):
+            regressions.append("{}: time {:.3f}s -> {:.3f}s ({})".format(
+                name, old["seconds"], r["seconds"], 
+                _change(old["seconds"], r["seconds"])))
+        if r["peakBytes"] > old["peakBytes"] * (1 + tolerance):
+            regressions.append("{}: memory {} -> {} bytes ({})".format(
+                name, old["peakBytes"], r["peakBytes"], 
+                _change(old["peakBytes"], r["peakBytes"])))
+    return regressions
+
+def main(argv=None):
+    """Command line entry point, see python -m ulsys.bench --help."""
+    parser = argparse.ArgumentParser(
+        prog="python -m ulsys.bench", 
+        description="Benchmarks the ulsys evaluators and turtles.")
+    parser.add_argument("-o", "--output", 
+                        help="write the results as JSON to this file")
+    parser.add_argument("-c", "--compare", metavar="BASELINE",
+                        help="compare with an earlier JSON result and exit "
+                             "with status 1 on any regression")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.25,
+                        help="allowed slowdown as a fraction (default 0.25)")
+    parser.add_argument("-b", "--budget", type=int, default=200000,
+                        help="largest generation to run, in symbols")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="timed runs per case, the best one counts")
+    parser.add_argument("-s", "--system", action="append", choices=SYSTEMS,
+                        help="only run this system (can be repeated)")
+    parser.add_argument("-k", "--benchmark", action="append",
+                        help="only run this benchmark (can be repeated)")
+    args = parser.parse_args(argv)
+    
+    def log(r):
+        print("{benchmark:28} {system:14} n={n:<3} {seconds:10.4f}s "
+              "{peakBytes:>12} B".format(**r), file=sys.stderr)
+    
+    current = runBenchmarks(args.system or SYSTEMS, args.budget, args.repeat,
+                            args.benchmark, log)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    else:
+        json.dump(current, sys.stdout, indent=2)
+        print()
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compareResults(baseline, current, args.tolerance)
+        for message in regressions:
+            print("REGRESSION " + message, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
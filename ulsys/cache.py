@@ -0,0 +1,222 @@
+"""
+ulsys persistent result cache.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import os
+import random
+import sys
+import tempfile
+
+from .standard.standard import CompiledSystem, _ruleDict
+from .standard.mapped import MappedGeneration
+from .stochastic import stochastic
+
+__all__ = [
+    "ResultCache"
+]
+
+# Changing how results are stored must change this, so old entries are 
+# never read back with the new format.
+_FORMAT = "ulsys-ids-1"
+_SUFFIX = ".ids"
+
+def _canonicalSymbol(x):
+    return "{}.{}:{!r}".format(type(x).__module__, type(x).__qualname__, x)
+
+def _canonicalSymbols(symbols):
+    return [_canonicalSymbol(x) for x in symbols]
+
+class ResultCache:
+    """An on-disk cache of evaluated L-Systems, shared between processes.
+    
+    Results are stored in directory, one file per (axiom, rules, n) and, for
+    stochastic systems, seed. A file is named by the SHA-256 hash of a 
+    canonical description of what was evaluated, and holds the symbol IDs 
+    of the generation and nothing else, as for evaluateToFile(). So a hit 
+    is a MappedGeneration of the file, found and mapped without parsing 
+    anything but the rules.
+    
+    Symbols are described by their type and repr(), so they need a repr 
+    that is the same in every process for entries to be found again; 
+    single character strings, the common case, have one.
+    
+    Entries are written to a temporary file which is then renamed into 
+    place, so concurrent writers of the same entry can't leave it half 
+    written. The cache is kept under maxBytes by deleting the least recently
+    used entries after each write, a hit touching the modification time of
+    its file.
+    
+        >>> import ulsys
+        >>> cache = ResultCache(tempfile.mkdtemp())
+        >>> g = cache.evaluateSystem("F++F++F", ulsys.kochFlake.rules, 4)
+        >>> cache.misses, g == ulsys.kochFlake(4)
+        (1, True)
+        >>> g.close()
+        >>> with cache.evaluateSystem("F++F++F", ulsys.kochFlake.rules, 4) as g:
+        ...     cache.hits, len(g)
+        (1, 1792)
+    
+    The order of the rules doesn't matter:
+    
+        >>> from ulsys.standard import production
+        >>> with cache.evaluateSystem("0", production("1->11", "0->1[0]0"), 2) as g:
+        ...     list(g)
+        ['1', '1', '[', '1', '[', '0', ']', '0', ']', '1', '[', '0', ']', '0']
+        >>> with cache.evaluateSystem("0", production("0->1[0]0", "1->11"), 2) as g:
+        ...     cache.hits, list(g)
+        (2, ['1', '1', '[', '1', '[', '0', ']', '0', ']', '1', '[', '0', ']', '0'])
+    """
+    def __init__(self, directory, maxBytes=1 << 30):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+    
+    def key(self, description):
+        """Returns the hex digest naming the entry for description, a list
+        of strings."""
+        h = hashlib.sha256()
+        for part in [_FORMAT, sys.byteorder] + description:
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+    
+    def path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+    
+    def evaluateSystem(self, axiom, rules, n):
+        """Like standard.evaluateSystem(), but returns a MappedGeneration of
+        the cached result, evaluating and storing it first on a miss."""
+        # Symbol IDs, and so the stored entries, depend on the order of the
+        # rules, which must be the same as for the key.
+        rules = _ruleDict(rules)
+        rules = {S: rules[S] for S in sorted(rules, key=_canonicalSymbol)}
+        description = ["standard", str(n)] + _canonicalSymbols(axiom)
+        for S in rules:
+            description.append(_canonicalSymbol(S))
+            description.extend(_canonicalSymbols(rules[S]))
+            description.append("")
+        system = CompiledSystem(axiom, rules)
+        return self._lookup(description, system, lambda: system.evaluate(n))
+    
+    def evaluateStochasticSystem(self, axiom, rules, n, seed):
+        """Like stochastic.evaluateSystem() given a seed, but returns a 
+        MappedGeneration of the cached result, evaluating and storing it 
+        first on a miss."""
+        rules = stochastic._ruleLists(rules)
+        rules = {S: rules[S] for S in sorted(rules, key=_canonicalSymbol)}
+        description = ["stochastic", str(n), repr(seed)] + \
+            _canonicalSymbols(axiom)
+        for S in rules:
+            description.append(_canonicalSymbol(S))
+            for R, Abc in rules[S]:
+                description.append(repr(float(R)))
+                description.extend(_canonicalSymbols(Abc))
+                description.append("")
+        system = stochastic.CompiledSystem(axiom, rules)
+        return self._lookup(description, system, 
+                            lambda: system.evaluate(n, random.Random(seed)))
+    
+    def _lookup(self, description, system, evaluate):
+        key = self.key(description)
+        path = self.path(key)
+        data = None
+        while True:
+            try:
+                generation = MappedGeneration(path, system)
+            except FileNotFoundError:
+                # Missing, or evicted by another process since it was 
+                # stored.
+                if data is None:
+                    self.misses += 1
+                    data = evaluate().tobytes()
+                self._store(path, data)
+                continue
+            break
+        if data is None:
+            self.hits += 1
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted after being opened, which is still readable.
+                pass
+        return generation
+    
+    def _store(self, path, data):
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.evict(keep=path)
+    
+    def entries(self):
+        """Returns a list of (mtime, size, path) for the entries, least 
+        recently used first."""
+        result = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                result.append((stat.st_mtime, stat.st_size, entry.path))
+        result.sort()
+        return result
+    
+    def evict(self, keep=None):
+        """Deletes least recently used entries until the cache is no larger
+        than maxBytes, never deleting keep."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Most likely mapped by someone on a system that doesn't 
+                # allow deleting open files.
+                continue
+            total -= size
+    
+    def clear(self):
+        """Deletes every entry."""
+        for _, _, path in self.entries():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
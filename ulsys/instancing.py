@@ -0,0 +1,222 @@
+"""
+ulsys geometry instancing.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .standard.standard import _ruleDict
+from .turtle.turtle import _flattenAction
+from .turtle.segments import _opcode, _FORWARD, _ROTATE, _PUSH, _POP
+
+__all__ = [
+    "GeometryCache",
+    "instancedSegments"
+]
+
+def _parts(action):
+    """The TurtleActions making up action, none if it can't be inspected."""
+    try:
+        return _flattenAction(action)
+    except TypeError:
+        return []
+
+class _Unbalanced(Exception):
+    """Raised when an expansion pops a state it didn't push."""
+
+class _Drawing:
+    """Turtle state and segments in some frame of reference."""
+    def __init__(self, x=0.0, y=0.0, angle=0.0):
+        self.x = x
+        self.y = y
+        self.angle = angle
+        self.states = []
+        self.chunks = []
+        # Segments drawn one at a time, as x0, y0, x1, y1, not yet in chunks.
+        self.pending = []
+    
+    def _flush(self):
+        if self.pending:
+            self.chunks.append(numpy.array(self.pending).reshape(-1, 2, 2))
+            self.pending = []
+    
+    def forward(self, scale):
+        x = self.x + math.cos(self.angle) * scale
+        y = self.y + math.sin(self.angle) * scale
+        self.pending.extend((self.x, self.y, x, y))
+        self.x = x
+        self.y = y
+    
+    def place(self, instance):
+        """Draws an instance, moving and turning as it does."""
+        segments, dx, dy, turn = instance
+        c, s = math.cos(self.angle), math.sin(self.angle)
+        if len(segments):
+            self._flush()
+            self.chunks.append(
+                segments @ numpy.array([[c, s], [-s, c]]) + (self.x, self.y))
+        self.x += c * dx - s * dy
+        self.y += s * dx + c * dy
+        self.angle += turn
+    
+    def segments(self):
+        self._flush()
+        if not self.chunks:
+            return numpy.empty((0, 2, 2))
+        if len(self.chunks) > 1:
+            self.chunks = [numpy.concatenate(self.chunks)]
+        return self.chunks[0]
+
+class GeometryCache:
+    """Draws a standard L-System by instancing: the segments drawn by a 
+    symbol expanded to some depth are computed once, relative to the turtle,
+    and reused wherever that symbol and depth occur.
+    
+    An instance is stored as the segments drawn by a turtle starting at the
+    origin facing along the x axis, plus where it ends up: its displacement
+    and change in heading. It is placed by rotating and translating the 
+    segments to the turtle's actual state, so the work done per symbol and 
+    depth is a handful of NumPy operations instead of replaying every symbol
+    of its expansion.
+    
+    rules are as for standard.evaluateSystem(), and actions as for 
+    turtle.segmentArray(): only TurtleActions for forward, rotate, push and 
+    pop are interpreted, other actions are ignored. Expansions that pop 
+    states they didn't push can't be instanced and are replayed.
+    
+    Instances are kept in a least recently used cache of at most cacheBytes
+    bytes of segments, shared by all calls to segments(). Requires NumPy.
+    
+        >>> import ulsys
+        >>> cache = GeometryCache(ulsys.kochFlake.rules, ulsys.kochFlake.turtleActions)
+        >>> segments = cache.segments("F++F++F", 6)
+        >>> segments.shape
+        (12288, 2, 2)
+        >>> from ulsys.turtle import segmentArray
+        >>> expected = segmentArray(ulsys.kochFlake(6), ulsys.kochFlake.turtleActions)
+        >>> bool(abs(segments - expected).max() < 1e-9)
+        True
+        >>> len(cache), cache.bytes
+        (6, 174720)
+    """
+    def __init__(self, rules, actions, cacheBytes=64 << 20):
+        if numpy is None:
+            raise ImportError("GeometryCache requires NumPy")
+        self.rules = _ruleDict(rules)
+        self.operations = {
+            s: [_opcode(a) for a in _parts(action)]
+            for s, action in actions.items()
+        }
+        self.cacheBytes = cacheBytes
+        self.bytes = 0
+        # (symbol, depth) -> instance, or None if it can't be instanced.
+        self._instances = OrderedDict()
+    
+    def __len__(self):
+        """The number of cached instances."""
+        return len(self._instances)
+    
+    def segments(self, axiom, n, pos=(0.0, 0.0), angle=math.pi/2):
+        """Returns the segments drawn by generation n, starting from pos and
+        angle, as an array of shape (N, 2, 2) like segmentArray()."""
+        drawing = _Drawing(float(pos[0]), float(pos[1]), angle)
+        try:
+            for x in axiom:
+                self._draw(x, n, drawing)
+        except _Unbalanced:
+            raise ValueError("pop without a matching push")
+        return drawing.segments()
+    
+    def _draw(self, x, depth, drawing):
+        if depth > 0 and x in self.rules:
+            instance = self._instance(x, depth)
+            if instance is not None:
+                drawing.place(instance)
+            else:
+                for y in self.rules[x]:
+                    self._draw(y, depth - 1, drawing)
+            return
+        for kind, value in self.operations.get(x, ()):
+            if kind == _FORWARD:
+                drawing.forward(value)
+            elif kind == _ROTATE:
+                drawing.angle += value
+            elif kind == _PUSH:
+                drawing.states.append((drawing.x, drawing.y, drawing.angle))
+            elif kind == _POP:
+                if not drawing.states:
+                    raise _Unbalanced()
+                drawing.x, drawing.y, drawing.angle = drawing.states.pop()
+    
+    def _instance(self, x, depth):
+        key = (x, depth)
+        if key in self._instances:
+            self._instances.move_to_end(key)
+            return self._instances[key]
+        local = _Drawing()
+        try:
+            for y in self.rules[x]:
+                self._draw(y, depth - 1, local)
+        except _Unbalanced:
+            instance = None
+        else:
+            if local.states:
+                instance = None
+            else:
+                instance = (local.segments(), local.x, local.y, local.angle)
+        self._remember(key, instance)
+        return instance
+    
+    def _remember(self, key, instance):
+        size = 0 if instance is None else instance[0].nbytes
+        if size > self.cacheBytes:
+            return
+        self._instances[key] = instance
+        self.bytes += size
+        while self.bytes > self.cacheBytes:
+            _, old = self._instances.popitem(last=False)
+            if old is not None:
+                self.bytes -= old[0].nbytes
+
+def instancedSegments(axiom, rules, n, actions, pos=(0.0, 0.0), 
+                      angle=math.pi/2, cacheBytes=64 << 20):
+    """Returns the segments drawn by generation n of a standard L-System, 
+    as an array of shape (N, 2, 2) like segmentArray(), computed with a 
+    GeometryCache instead of evaluating the generation. Requires NumPy.
+    
+        >>> import ulsys
+        >>> instancedSegments("0", ulsys.pythagorasTree.rules, 8, 
+        ...                   ulsys.pythagorasTree.turtleActions).shape
+        (1280, 2, 2)
+    """
+    cache = GeometryCache(rules, actions, cacheBytes)
+    return cache.segments(axiom, n, pos, angle)
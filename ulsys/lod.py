@@ -0,0 +1,116 @@
+"""
+ulsys level of detail drawing.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from .standard.standard import _ruleDict
+from .turtle import ArrayTurtle, mapActions
+from .turtle.dispatch import CompiledActions, _FORWARD, _CALL
+
+__all__ = [
+    "drawSystem"
+]
+
+def drawSystem(axiom, rules, n, actions, turtle, scales, resolution, 
+               size=None, threshold=1.0, standIns=None):
+    """Evaluates a standard L-System and draws it with a turtle in one pass,
+    only expanding symbols as deep as the output resolution calls for.
+    
+    axiom, rules and n are as for standard.evaluateSystem(), and actions and
+    turtle as for turtle.mapActions().
+    
+    The axiom is drawn with forward steps of length 1. scales is a 
+    dictionary symbol->factor, or a single factor for every symbol: when a 
+    symbol is rewritten, the forward steps of its production are that factor
+    times as long as its own. For a drawing that keeps its size as n grows,
+    the factor is the inverse of how much longer the production is, like 
+    1/3 for the Koch curve F->F-F++F-F.
+    
+    resolution is the width of the output in pixels and size the width of 
+    the drawing in turtle units, by default the width of the axiom drawn 
+    with actions, or 1 if that draws nothing. A symbol is not rewritten 
+    once its steps are shorter than threshold pixels; its stand-in is drawn
+    instead, with the same step length. standIns is an optional dictionary 
+    symbol->symbols giving the stand-ins; by default a symbol stands in for
+    itself.
+    
+    The symbols are expanded depth-first as in standard.iterateSystem(), so
+    the work is bounded by the resolution rather than n.
+    
+        >>> import ulsys
+        >>> from ulsys.turtle import ArrayTurtle
+        >>> flake = [drawSystem("F++F++F", ulsys.kochFlake.rules, n, 
+        ...                     ulsys.kochFlake.turtleActions, ArrayTurtle(),
+        ...                     {"F": 1/3}, resolution=300) for n in (3, 40)]
+        >>> [len(t) for t in flake]
+        [192, 12288]
+    """
+    rules = _ruleDict(rules)
+    if not isinstance(scales, dict):
+        scales = dict.fromkeys(rules, scales)
+    if standIns is None:
+        standIns = dict()
+    if size is None:
+        size = _width(axiom, actions)
+    minLength = threshold * size / resolution
+    table = CompiledActions(actions, turtle, fold=False).table
+    
+    def draw(symbols, length):
+        for x in symbols:
+            for kind, f, arg in table.get(x, ()):
+                if kind == _FORWARD:
+                    f(arg * length)
+                elif kind == _CALL:
+                    f(*arg)
+                else:
+                    f(arg)
+    
+    # stack[i] iterates over symbols belonging to generation i, whose 
+    # steps have length lengths[i].
+    stack = [iter(axiom)]
+    lengths = [1.0]
+    while stack:
+        length = lengths[-1]
+        for x in stack[-1]:
+            if len(stack) <= n and x in rules:
+                if length >= minLength:
+                    stack.append(iter(rules[x]))
+                    lengths.append(length * scales.get(x, 1.0))
+                    break
+                draw(standIns.get(x, (x,)), length)
+            else:
+                draw((x,), length)
+        else:
+            stack.pop()
+            lengths.pop()
+    return turtle
+
+def _width(axiom, actions):
+    """The width or height of the axiom's drawing, whichever is larger."""
+    t = mapActions(axiom, actions, ArrayTurtle())
+    xs = t.vertices[0::2]
+    ys = t.vertices[1::2]
+    return max(max(xs) - min(xs), max(ys) - min(ys)) or 1.0
@@ -99,9 +99,10 @@ if __name__ != "__main__":
     from .standard import evaluateSystem, production
     
     def pythagorasTree(n, axiom="0"):
-        symbols = evaluateSystem("0", production("1->11", "0->1[0]0"), n)
+        symbols = evaluateSystem("0", pythagorasTree.rules, n)
         return symbols
     
+    pythagorasTree.rules = production("1->11", "0->1[0]0")
     pythagorasTree.turtleActions = {
         "0": TurtleAction.forward(),
         "1": TurtleAction.forward(),
@@ -110,9 +111,10 @@ if __name__ != "__main__":
     }
     
     def fractalPlant(n, axiom="X"):
-        symbols = evaluateSystem(axiom, {"X":list("C0FF+[C1+F]+[C3-F]"), "F":list("C0FF-[C1-F+F]+[C2+F-F]")}, n)
+        symbols = evaluateSystem(axiom, fractalPlant.rules, n)
         return symbols
     
+    fractalPlant.rules = {"X":list("C0FF+[C1+F]+[C3-F]"), "F":list("C0FF-[C1-F+F]+[C2+F-F]")}
     fractalPlant.turtleActions = {
             "F":TurtleAction.forward(),
             "-":TurtleAction.rotate(-math.pi / 9),
@@ -122,9 +124,10 @@ if __name__ != "__main__":
         }
     
     def kochFlake(n, axiom="F++F++F"):
-        symbols = evaluateSystem(axiom, production("F->F-F++F-F"), n)
+        symbols = evaluateSystem(axiom, kochFlake.rules, n)
         return symbols
     
+    kochFlake.rules = production("F->F-F++F-F")
     kochFlake.turtleActions = {
             "F":TurtleAction.forward(),
             "-":TurtleAction.rotate(-math.pi / 3),
@@ -134,9 +137,10 @@ if __name__ != "__main__":
         }
     
     def triKochFlake(n, axiom="F++F++F"):
-        symbols = evaluateSystem(axiom, {"F":list("F-X++X-F"), "X":list("[-F++F++F]")}, n)
+        symbols = evaluateSystem(axiom, triKochFlake.rules, n)
         return symbols
-        
+    
+    triKochFlake.rules = {"F":list("F-X++X-F"), "X":list("[-F++F++F]")}
     triKochFlake.turtleActions = kochFlake.turtleActions
 
 if __name__ == "__main__":
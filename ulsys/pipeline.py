@@ -0,0 +1,174 @@
+"""
+ulsys asynchronous rendering pipeline.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import inspect
+import io
+import itertools
+
+from .turtle import mapActions
+from .turtle.svg import SVGTurtle
+
+__all__ = [
+    "streamSVG"
+]
+
+class _TextChunks(io.TextIOBase):
+    """A write-only text file that collects what is written to it."""
+    def __init__(self):
+        self.parts = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        self.parts.append(text)
+        return len(text)
+    
+    def take(self):
+        """Returns what has been written since the last call, as UTF-8."""
+        data = "".join(self.parts).encode("utf-8")
+        self.parts = []
+        return data
+
+async def _chunks(symbols, chunkSize):
+    """Yields lists of at most chunkSize symbols from an iterable or an 
+    asynchronous iterable."""
+    if hasattr(symbols, "__aiter__"):
+        chunk = []
+        async for x in symbols:
+            chunk.append(x)
+            if len(chunk) >= chunkSize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+        return
+    symbols = iter(symbols)
+    while True:
+        chunk = list(itertools.islice(symbols, chunkSize))
+        if not chunk:
+            return
+        yield chunk
+
+async def _write(writer, data):
+    result = writer.write(data)
+    if inspect.isawaitable(result):
+        await result
+    drain = getattr(writer, "drain", None)
+    if drain is not None:
+        await drain()
+
+async def streamSVG(symbols, actions, writer, viewBox, linewidth=0.15,
+                    precision=4, chunkSize=4096, queueSize=4):
+    """Renders symbols as an SVG and streams it to writer, without blocking 
+    the event loop for long.
+    
+    Three stages run as tasks, connected by queues of at most queueSize 
+    items, so a slow stage holds the ones before it back:
+    
+        symbols, an iterable or asynchronous iterable, is read chunkSize 
+        symbols at a time. With a lazy source like standard.iterateSystem()
+        nothing is evaluated before it is needed.
+        Each chunk is interpreted by mapActions() with actions on an 
+        SVGTurtle, and the path data it produced is passed on as UTF-8.
+        The data is written to writer, whose write() may be a coroutine 
+        function, as for many async HTTP responses, or a plain function 
+        followed by a drain() coroutine, as for asyncio.StreamWriter.
+    
+    Between chunks control goes back to the event loop, so the first bytes 
+    are written after one chunk and many renders can run concurrently. 
+    
+    As the document is written as it goes, its viewBox can't be patched in
+    at the end like SVGTurtle does for files, so it must be given: a tuple 
+    (x, y, width, height) in SVG coordinates, where y points down, so that 
+    turtle extents xmin, ymin, xmax, ymax give (xmin, -ymax, xmax - xmin, 
+    ymax - ymin). Without one most drawings would be clipped away, the 
+    turtle starting upwards. Returns the viewBox of the drawing, which can 
+    be used for the next request.
+    
+        >>> import ulsys
+        >>> from ulsys import standard
+        >>> class Writer:
+        ...     def __init__(self):
+        ...         self.parts = []
+        ...     async def write(self, data):
+        ...         self.parts.append(data)
+        >>> w = Writer()
+        >>> symbols = standard.iterateSystem("F++F++F", ulsys.kochFlake.rules, 4)
+        >>> box = asyncio.run(streamSVG(symbols, ulsys.kochFlake.turtleActions, 
+        ...                             w, (-70, -82, 95, 82), chunkSize=100))
+        >>> len(w.parts), b"".join(w.parts).endswith(b"</svg>\\n")
+        (19, True)
+        >>> [round(x) for x in box]
+        [-70, -81, 94, 81]
+    """
+    if viewBox is None:
+        raise ValueError("a streamed SVG needs a viewBox")
+    symbolQueue = asyncio.Queue(queueSize)
+    dataQueue = asyncio.Queue(queueSize)
+    done = object()
+    
+    async def read():
+        async for chunk in _chunks(symbols, chunkSize):
+            await symbolQueue.put(chunk)
+            await asyncio.sleep(0)
+        await symbolQueue.put(done)
+    
+    async def interpret():
+        f = _TextChunks()
+        turtle = SVGTurtle(f, linewidth=linewidth, precision=precision, 
+                           viewBox=viewBox)
+        while True:
+            chunk = await symbolQueue.get()
+            if chunk is done:
+                break
+            mapActions(chunk, actions, turtle)
+            turtle.flush()
+            await dataQueue.put(f.take())
+        turtle.close()
+        await dataQueue.put(f.take())
+        await dataQueue.put(done)
+        return turtle.viewBox()
+    
+    async def output():
+        while True:
+            data = await dataQueue.get()
+            if data is done:
+                break
+            await _write(writer, data)
+    
+    tasks = [asyncio.ensure_future(stage()) 
+             for stage in (read, interpret, output)]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return results[1]
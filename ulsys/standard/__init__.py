@@ -1 +1,14 @@
 from .standard import *
+from .standard import __all__ as _eager
+from .._lazy import lazyModule
+
+_lazy = {
+    "growth": ["growthMatrix", "symbolCounts", "systemLength", 
+               "largestGeneration"],
+    "view": ["GenerationView"],
+    "generations": ["Generations"],
+    "parallel": ["parallelEvaluateSystem"],
+    "mapped": ["MappedGeneration", "evaluateToFile"]
+}
+__all__ = _eager + [name for names in _lazy.values() for name in names]
+__getattr__, __dir__ = lazyModule(__name__, _lazy)
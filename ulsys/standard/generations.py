@@ -0,0 +1,142 @@
+"""
+ulsys standard L-System incremental evaluation.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from collections import OrderedDict
+
+from .standard import CompiledSystem, evaluateSystem, production
+
+__all__ = [
+    "Generations"
+]
+
+class Generations:
+    """Evaluates a standard L-System incrementally, one generation at a time.
+    
+    The latest generation is held by the object and step() rewrites it once,
+    so evaluating generations 1..N costs as much as evaluating generation N
+    alone. Earlier generations are kept in a cache of at most cacheSize 
+    entries, the least recently used being evicted first. An evicted 
+    generation is recomputed from the closest earlier one still cached, or 
+    from the axiom.
+    
+    axiom and rules are the same as for evaluateSystem().
+    
+        >>> g = Generations("0", production("1->11", "0->1[0]0"))
+        >>> g.n, g.current
+        (0, ['0'])
+        >>> g.step()
+        ['1', '[', '0', ']', '0']
+        >>> g[2] == evaluateSystem("0", production("1->11", "0->1[0]0"), 2)
+        True
+        >>> g.n
+        2
+        
+    Iterating yields the current generation and then steps forever:
+    
+        >>> import itertools
+        >>> [len(x) for x in itertools.islice(Generations("F", production("F->FF")), 5)]
+        [1, 2, 4, 8, 16]
+    """
+    def __init__(self, axiom, rules, cacheSize=8):
+        self.system = self._compile(axiom, rules)
+        self.cacheSize = cacheSize
+        self.n = 0
+        self.ids = self.system.axiom
+        self._initialState = self._snapshot()
+        self._cache = OrderedDict()
+    
+    def _compile(self, axiom, rules):
+        return CompiledSystem(axiom, rules)
+    
+    def _snapshot(self):
+        """Returns what _replay() needs to redo the steps taken from the 
+        current generation."""
+        return None
+    
+    def _advance(self, ids):
+        """Rewrites the current generation once."""
+        return self.system.step(ids)
+    
+    def _replay(self, ids, count, state):
+        """Rewrites an earlier generation count times, state being the 
+        snapshot taken when it was current. Returns the result and a snapshot
+        to continue from it."""
+        return self.system.evaluate(count, ids), None
+    
+    def _remember(self, n, ids, state):
+        if self.cacheSize < 1:
+            return
+        self._cache[n] = (ids, state)
+        self._cache.move_to_end(n)
+        while len(self._cache) > self.cacheSize:
+            self._cache.popitem(last=False)
+    
+    @property
+    def current(self):
+        """The current generation as a list of symbols."""
+        return self.system.decode(self.ids)
+    
+    def step(self):
+        """Advances to the next generation and returns it as a list."""
+        self._remember(self.n, self.ids, self._snapshot())
+        self.ids = self._advance(self.ids)
+        self.n += 1
+        return self.current
+    
+    def generation(self, n):
+        """Returns generation n as an array of symbol IDs. 
+        
+        If n is ahead of the current generation the object steps forward to 
+        it, otherwise the current generation is left as it is.
+        """
+        if n < 0:
+            raise IndexError("generations start at 0")
+        if n >= self.n:
+            while self.n < n:
+                self.step()
+            return self.ids
+        if n in self._cache:
+            self._cache.move_to_end(n)
+            return self._cache[n][0]
+        below = [k for k in self._cache if k < n]
+        if below:
+            k = max(below)
+            ids, state = self._cache[k]
+        else:
+            k, ids, state = 0, self.system.axiom, self._initialState
+        ids, state = self._replay(ids, n - k, state)
+        self._remember(n, ids, state)
+        return ids
+    
+    def __getitem__(self, n):
+        return self.system.decode(self.generation(n))
+    
+    def __iter__(self):
+        yield self.current
+        while True:
+            yield self.step()
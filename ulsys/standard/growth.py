@@ -0,0 +1,146 @@
+"""
+ulsys standard L-System growth analysis.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from .standard import _ruleDict, production
+
+__all__ = [
+    "growthMatrix",
+    "symbolCounts",
+    "systemLength",
+    "largestGeneration"
+]
+
+def _alphabet(axiom, productions):
+    """Lists every distinct symbol in the axiom and the productions, where 
+    productions is a dictionary S->iterable of output sequences."""
+    alphabet = dict()
+    for S, outputs in productions.items():
+        alphabet.setdefault(S, len(alphabet))
+        for Abc in outputs:
+            for x in Abc:
+                alphabet.setdefault(x, len(alphabet))
+    for x in axiom:
+        alphabet.setdefault(x, len(alphabet))
+    return alphabet
+
+def _countVector(symbols, alphabet):
+    v = [0] * len(alphabet)
+    for x in symbols:
+        v[alphabet[x]] += 1
+    return v
+
+def _vectorTimesMatrix(v, M):
+    res = [0] * len(v)
+    for vi, row in zip(v, M):
+        if vi:
+            for j, mij in enumerate(row):
+                if mij:
+                    res[j] += vi * mij
+    return res
+
+def _matrixTimesMatrix(A, B):
+    return [_vectorTimesMatrix(row, B) for row in A]
+
+def _vectorTimesPower(v, M, n):
+    """Computes v * M^n by repeated squaring of M."""
+    while n > 0:
+        if n & 1:
+            v = _vectorTimesMatrix(v, M)
+        n >>= 1
+        if n > 0:
+            M = _matrixTimesMatrix(M, M)
+    return v
+
+def growthMatrix(axiom, rules):
+    """Builds the growth (Parikh) matrix of a standard L-System.
+    
+    Returns a tuple (alphabet, M) where alphabet is a list of the symbols in
+    the system and M is a square matrix as a list of rows, such that M[i][j] 
+    is the number of times alphabet[j] occurs in the production of 
+    alphabet[i]. Symbols without a rule produce themselves.
+    
+    axiom and rules are the same as for evaluateSystem().
+    
+        >>> growthMatrix("0", production("1->11", "0->1[0]0"))
+        (['1', '0', '[', ']'], [[2, 0, 0, 0], [1, 2, 1, 1], [0, 0, 1, 0], [0, 0, 0, 1]])
+    """
+    rules = _ruleDict(rules)
+    alphabet = _alphabet(axiom, {S: [Abc] for S, Abc in rules.items()})
+    M = []
+    for x in alphabet:
+        M.append(_countVector(rules[x] if x in rules else [x], alphabet))
+    return list(alphabet), M
+
+def symbolCounts(axiom, rules, n):
+    """Counts how many times each symbol occurs in generation n, without 
+    evaluating the system.
+    
+    The counts are computed from the growth matrix by repeated squaring, so 
+    the cost grows with log(n) and the size of the alphabet rather than with
+    the length of the output. Returns a dictionary symbol->count; symbols that
+    don't occur are included with a count of 0.
+    
+        >>> symbolCounts("F++F++F", production("F->F-F++F-F"), 3)
+        {'F': 192, '-': 126, '+': 130}
+    """
+    alphabet, M = growthMatrix(axiom, rules)
+    v = _countVector(axiom, dict(zip(alphabet, range(len(alphabet)))))
+    return dict(zip(alphabet, _vectorTimesPower(v, M, max(n, 0))))
+
+def systemLength(axiom, rules, n):
+    """Returns the number of symbols in generation n, without evaluating the
+    system.
+    
+        >>> systemLength("0", production("1->11", "0->1[0]0"), 2)
+        14
+        >>> systemLength("F++F++F", production("F->F-F++F-F"), 40)
+        8462480737302404222943232
+    """
+    return sum(symbolCounts(axiom, rules, n).values())
+
+def largestGeneration(axiom, rules, maxLength, limit=64):
+    """Finds the largest n <= limit such that no generation up to and 
+    including n is longer than maxLength symbols.
+    
+    Useful for picking the deepest generation that fits in a memory budget.
+    Returns None if the axiom itself is too long.
+    
+        >>> largestGeneration("F++F++F", production("F->F-F++F-F"), 10**6)
+        8
+        >>> largestGeneration("AB", production("A->B", "B->A"), 10)
+        64
+    """
+    alphabet, M = growthMatrix(axiom, rules)
+    v = _countVector(axiom, dict(zip(alphabet, range(len(alphabet)))))
+    if sum(v) > maxLength:
+        return None
+    for n in range(limit):
+        v = _vectorTimesMatrix(v, M)
+        if sum(v) > maxLength:
+            return n
+    return limit
@@ -0,0 +1,203 @@
+"""
+ulsys memory-mapped generation storage.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import mmap
+import os
+import time
+from array import array
+from collections import Counter
+
+from .standard import CompiledSystem, _numpy, _ruleDict, evaluateSystem, production
+
+__all__ = [
+    "MappedGeneration",
+    "evaluateToFile"
+]
+
+class MappedGeneration:
+    """A read-only sequence view of a generation stored in a file of symbol
+    IDs, as written by evaluateToFile().
+    
+    The file holds nothing but the IDs, in the machine's byte order and 
+    system.typecode, and is read through mmap, so the operating system pages
+    it in and out as needed. Indexing, slicing and iteration decode IDs with
+    system, a CompiledSystem; iteration goes chunkSize IDs at a time, so the
+    view can be passed to turtle.mapActions() directly.
+    
+    The view can be used as a context manager, which closes it.
+    """
+    def __init__(self, path, system, chunkSize=1 << 20):
+        self.path = path
+        self.system = system
+        self.chunkSize = chunkSize
+        self.itemsize = array(system.typecode).itemsize
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self.length = size // self.itemsize
+        # mmap can't map an empty file.
+        self._map = None
+        if size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def __len__(self):
+        return self.length
+    
+    def __repr__(self):
+        return "MappedGeneration({!r}, length={})".format(self.path, self.length)
+    
+    def ids(self, start=0, stop=None):
+        """Returns the IDs from start to stop as an array, a NumPy array 
+        backed by the file itself if NumPy is installed."""
+        if stop is None or stop > self.length:
+            stop = self.length
+        start = min(max(start, 0), stop)
+        numpy = _numpy()
+        if numpy is not None:
+            if start == stop:
+                return numpy.empty(0, dtype=self.system._dtype)
+            return numpy.frombuffer(self._map, dtype=self.system._dtype, 
+                                    count=stop - start, 
+                                    offset=start * self.itemsize)
+        result = array(self.system.typecode)
+        if start < stop:
+            result.frombytes(
+                self._map[start * self.itemsize:stop * self.itemsize])
+        return result
+    
+    def chunks(self):
+        """Yields the IDs chunkSize at a time."""
+        for start in range(0, self.length, self.chunkSize):
+            yield self.ids(start, start + self.chunkSize)
+    
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            start, stop, stride = k.indices(self.length)
+            if stride == 1:
+                return self.system.decode(self.ids(start, stop))
+            indices = range(start, stop, stride)
+            if not indices:
+                return []
+            first = min(indices[0], indices[-1])
+            ids = self.ids(first, max(indices[0], indices[-1]) + 1)
+            return [self.system.alphabet[ids[i - first]] for i in indices]
+        if k < 0:
+            k += self.length
+        if not 0 <= k < self.length:
+            raise IndexError("generation index out of range")
+        return self.system.alphabet[self.ids(k, k + 1)[0]]
+    
+    def __iter__(self):
+        for ids in self.chunks():
+            symbols = self.system.decode(ids)
+            # A view of the map must not be kept alive while suspended, or
+            # close() couldn't unmap it.
+            del ids
+            yield from symbols
+    
+    def __eq__(self, other):
+        try:
+            if self.length != len(other):
+                return False
+        except TypeError:
+            return NotImplemented
+        return all(a == b for a, b in zip(self, other))
+    
+    __hash__ = None
+    
+    def close(self):
+        """Unmaps and closes the file, which is left on disk. 
+        
+        Arrays returned by ids() or chunks() that are still alive keep the 
+        map open until they are gone."""
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Unmapped when the last view is garbage collected.
+                pass
+            self._map = None
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def evaluateToFile(axiom, rules, n, path, chunkSize=1 << 20, stats=None):
+    """Evaluates a standard L-System out of core, with each generation 
+    stored on disk instead of in memory.
+    
+    axiom, rules, n and stats are the same as for evaluateSystem(). 
+    Generation k is read back through mmap chunkSize symbols at a time, 
+    and each chunk's expansion is appended to a file path + ".next" holding
+    generation k+1, which then replaces path. So at most two generations 
+    are on disk at once, and only a few chunks are in memory.
+    
+    Returns a MappedGeneration of generation n, stored in path.
+    
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), "koch")
+        >>> with evaluateToFile("F", production("F->F-F++F-F"), 5, path, 
+        ...                     chunkSize=100) as g:
+        ...     len(g), g[:9], g == evaluateSystem("F", production("F->F-F++F-F"), 5)
+        (2388, ['F', '-', 'F', '+', '+', 'F', '-', 'F', '-'], True)
+        >>> g = MappedGeneration(path, g.system)
+        >>> g[5:1:-1], g[::-3][:3]
+        (['F', '+', '+', 'F'], ['F', '+', '-'])
+        >>> it = iter(g)
+        >>> next(it), g.close()
+        ('F', None)
+        >>> os.listdir(os.path.dirname(path))
+        ['koch']
+    """
+    system = CompiledSystem(axiom, _ruleDict(rules))
+    with open(path, "wb") as f:
+        f.write(system.encode(axiom).tobytes())
+    following = path + ".next"
+    for k in range(1, n + 1):
+        start = time.perf_counter()
+        histogram = Counter()
+        length = 0
+        with MappedGeneration(path, system, chunkSize) as g, \
+             open(following, "wb") as f:
+            for ids in g.chunks():
+                ids = system.step(ids)
+                f.write(ids.tobytes())
+                length += len(ids)
+                if stats is not None:
+                    histogram.update(system.histogram(ids))
+        os.replace(following, path)
+        if stats is not None:
+            seconds = time.perf_counter() - start
+            order = {x: i for i, x in enumerate(system.alphabet)}
+            stats.generation(k, length, seconds, 
+                             dict(sorted(histogram.items(), 
+                                         key=lambda item: order[item[0]])))
+    return MappedGeneration(path, system, chunkSize)
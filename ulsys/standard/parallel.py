@@ -0,0 +1,138 @@
+"""
+ulsys standard L-System parallel evaluation.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .standard import CompiledSystem, _numpy, _ruleDict, evaluateSystem, production
+
+__all__ = [
+    "parallelEvaluateSystem"
+]
+
+# The compiled system of a worker process, set by _initWorker.
+_system = None
+
+def _initWorker(system):
+    global _system
+    _system = system
+
+def _splitGeneration(system, n, chunks, evaluate):
+    """Evaluates the first generation k <= n with at least chunks symbols 
+    and splits it into up to chunks contiguous pieces. Returns k and a list 
+    of (start, stop) ranges."""
+    k = 0
+    ids = system.axiom
+    while k < n and len(ids) < chunks:
+        ids = evaluate(ids)
+        k += 1
+    chunks = max(min(chunks, len(ids)), 1)
+    bounds = [len(ids) * i // chunks for i in range(chunks + 1)]
+    return k, ids, list(zip(bounds, bounds[1:]))
+
+def _expandedLengths(system, depth):
+    """Returns, for every symbol ID, its length after depth rewrites."""
+    lengths = [1] * len(system.alphabet)
+    for _ in range(depth):
+        lengths = [sum(lengths[x] for x in p) for p in system.productions]
+    return lengths
+
+def _writeChunk(name, offset, ids, depth):
+    """Worker: expands ids depth times into the shared buffer name, starting
+    at symbol offset."""
+    result = _system.evaluate(depth, _system._asIds(ids))
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        data = memoryview(result).cast("B")
+        start = offset * result.itemsize
+        shm.buf[start:start + len(data)] = data
+    finally:
+        shm.close()
+
+def parallelEvaluateSystem(axiom, rules, n, processes=None, chunks=None):
+    """Evaluates a standard L-System on several processes.
+    
+    Each symbol of a generation is expanded independently of the others, so
+    the first generation k with at least chunks symbols is evaluated here,
+    split into chunks contiguous pieces, and each piece is expanded to 
+    generation n by a process pool. The exact length of every piece is known
+    in advance from the rules, so the processes write their output straight
+    into a single shared memory buffer, in order, and no concatenation is 
+    needed.
+    
+    axiom, rules and n are the same as for evaluateSystem(), and so is the
+    result. processes defaults to the number of CPUs and chunks to four 
+    times the number of processes. Rules and symbols must be picklable.
+    
+        >>> rules = production("1->11", "0->1[0]0")
+        >>> parallelEvaluateSystem("0", rules, 8, processes=2) == evaluateSystem("0", rules, 8)
+        True
+    """
+    rules = _ruleDict(rules)
+    if n < 1:
+        return axiom
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunks is None:
+        chunks = 4 * processes
+    system = CompiledSystem(axiom, rules)
+    k, ids, ranges = _splitGeneration(system, n, chunks, system.step)
+    if k == n:
+        return system.decode(ids)
+    
+    lengths = _expandedLengths(system, n - k)
+    offsets = [0]
+    for start, stop in ranges:
+        offsets.append(offsets[-1] + sum(lengths[x] for x in ids[start:stop]))
+    itemsize = system.axiom.itemsize
+    shm = shared_memory.SharedMemory(create=True, 
+                                     size=max(offsets[-1] * itemsize, 1))
+    try:
+        with ProcessPoolExecutor(processes, initializer=_initWorker, 
+                                 initargs=(system,)) as pool:
+            futures = [
+                pool.submit(_writeChunk, shm.name, offset, ids[start:stop], 
+                            n - k)
+                for (start, stop), offset in zip(ranges, offsets)
+            ]
+            for f in futures:
+                f.result()
+        numpy = _numpy()
+        if numpy is not None:
+            result = numpy.frombuffer(shm.buf, dtype=system._dtype, 
+                                      count=offsets[-1])
+        else:
+            result = shm.buf[:offsets[-1] * itemsize].cast(system.typecode)
+        try:
+            return system.decode(result)
+        finally:
+            del result
+    finally:
+        shm.close()
+        shm.unlink()
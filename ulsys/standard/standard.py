@@ -26,11 +26,26 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import itertools
+import time
+from array import array
+from collections import Counter
+
+from .._lazy import optionalImport
+
 __all__ = [
+    "CompiledSystem",
+    "evaluateString",
     "evaluateSystem",
+    "iterateSystem",
     "production"
 ]
 
+def _numpy():
+    """Returns NumPy, or None if it isn't installed. It is only imported once
+    a CompiledSystem is built, so that rewriting strings doesn't load it."""
+    return optionalImport("numpy")
+
 def production(*args):
     """Creates a production rule or list of rules from the input.
     
@@ -80,7 +95,193 @@ def production(*args):
         return res[0]
     return res
 
-def evaluateSystem(axiom, rules, n):
+def _ruleDict(rules):
+    """Normalizes any of the rule formats accepted by evaluateSystem to a
+    dictionary S->Symbols."""
+    if issubclass(type(rules), tuple):
+        rules = [rules]
+    if issubclass(type(rules), list):
+        rules = dict(rules)
+    return rules
+
+class CompiledSystem:
+    """A standard L-System compiled to integer-coded rule tables.
+    
+    Every symbol found in the axiom or the rules is assigned a small integer 
+    ID. alphabet maps an ID back to its symbol. Generations are stored as 
+    compact arrays of IDs, NumPy arrays if NumPy is installed and array.array
+    otherwise, and rewritten with a batched gather rather than symbol by 
+    symbol.
+    
+    Symbols are told apart by type as well as by value, so that for example
+    a FunctionalSymbol is not merged with the string of the same name.
+    
+        >>> system = CompiledSystem("0", production("1->11", "0->1[0]0"))
+        >>> system.alphabet
+        ['1', '0', '[', ']']
+        >>> system.evaluate(1).tolist()
+        [0, 2, 1, 3, 1]
+        >>> system.decode(system.evaluate(2))
+        ['1', '1', '[', '1', '[', '0', ']', '0', ']', '1', '[', '0', ']', '0']
+    """
+    def __init__(self, axiom, rules):
+        rules = _ruleDict(rules)
+        symbols = [S for S in rules]
+        for Abc in rules.values():
+            symbols.extend(Abc)
+        symbols.extend(axiom)
+        self._compileAlphabet(symbols)
+        
+        # Symbols without a rule produce themselves.
+        self.productions = [
+            self.encode(rules[S]) if S in rules else array(self.typecode, [i])
+            for i, S in enumerate(self.alphabet)
+        ]
+        self._table = _ProductionTable(self.productions, self.typecode)
+        self.axiom = self._asIds(self.encode(axiom))
+    
+    def _compileAlphabet(self, symbols):
+        self.alphabet = []
+        self._ids = dict()
+        for x in symbols:
+            key = (type(x), x)
+            if key not in self._ids:
+                self._ids[key] = len(self.alphabet)
+                self.alphabet.append(x)
+        
+        size = len(self.alphabet)
+        if size <= 1 << 8:
+            self.typecode = "B"
+        elif size <= 1 << 16:
+            self.typecode = "H"
+        else:
+            self.typecode = "L"
+        
+        numpy = _numpy()
+        if numpy is not None:
+            self._dtype = numpy.dtype(self.typecode)
+            self._symbols = numpy.empty(size, dtype=object)
+            self._symbols[:] = self.alphabet
+    
+    def _asIds(self, ids):
+        numpy = _numpy()
+        if numpy is not None and isinstance(ids, array):
+            return numpy.frombuffer(ids, dtype=self._dtype)
+        return ids
+    
+    def encode(self, symbols):
+        """Encodes a sequence of symbols as an array.array of IDs.
+        
+        Raises KeyError if a symbol is not part of the alphabet.
+        """
+        ids = self._ids
+        return array(self.typecode, [ids[(type(x), x)] for x in symbols])
+    
+    def decode(self, ids):
+        """Decodes a sequence of IDs into a list of symbols."""
+        numpy = _numpy()
+        if numpy is not None:
+            return self._symbols[numpy.asarray(ids)].tolist()
+        return list(map(self.alphabet.__getitem__, ids))
+    
+    def histogram(self, ids):
+        """Counts the symbols in a generation of IDs, returning a dictionary
+        symbol->count."""
+        numpy = _numpy()
+        if numpy is not None:
+            counts = numpy.bincount(self._asIds(ids), 
+                                    minlength=len(self.alphabet)).tolist()
+            return {x: c for x, c in zip(self.alphabet, counts) if c}
+        return {self.alphabet[i]: c for i, c in sorted(Counter(ids).items())}
+    
+    def step(self, ids):
+        """Rewrites a generation of IDs once, returning the next generation."""
+        return self._table.expand(self._asIds(ids))
+    
+    def evaluate(self, n, ids=None):
+        """Returns generation n, starting from ids or the axiom if ids is None."""
+        if ids is None:
+            ids = self.axiom
+        for _ in range(n):
+            ids = self.step(ids)
+        return ids
+
+class _ProductionTable:
+    """A list of productions, each an array.array of symbol IDs, flattened so
+    that a whole sequence of production indices can be expanded at once."""
+    def __init__(self, productions, typecode):
+        self.typecode = typecode
+        numpy = _numpy()
+        if numpy is not None:
+            dtype = numpy.dtype(typecode)
+            self._lengths = numpy.array(
+                [len(p) for p in productions], dtype=numpy.intp)
+            self._starts = numpy.cumsum(self._lengths) - self._lengths
+            self._flat = numpy.frombuffer(
+                b"".join(p.tobytes() for p in productions), dtype=dtype)
+        else:
+            self._bytes = [p.tobytes() for p in productions]
+    
+    def expand(self, keys):
+        """Concatenates the productions with the given indices."""
+        numpy = _numpy()
+        if numpy is not None:
+            lengths = self._lengths[keys]
+            offsets = numpy.cumsum(lengths) - lengths
+            # Position k of the output belongs to key i; it is read from the 
+            # flat table at starts[keys[i]] + (k - offsets[i]).
+            gather = numpy.arange(offsets[-1] + lengths[-1] if len(keys) else 0)
+            gather += numpy.repeat(self._starts[keys] - offsets, lengths)
+            return self._flat[gather]
+        result = array(self.typecode)
+        result.frombytes(b"".join(map(self._bytes.__getitem__, keys)))
+        return result
+
+def _isCharacterSystem(axiom, rules):
+    """Tells whether every symbol of a system is a one character string."""
+    symbols = itertools.chain(axiom, rules, *rules.values())
+    return all(type(x) is str and len(x) == 1 for x in symbols)
+
+def evaluateString(axiom, rules, n):
+    """Evaluates a standard L-System whose symbols are all single characters,
+    returning the generation as a string.
+    
+    axiom, rules and n are the same as for evaluateSystem(). Generations are
+    stored as strings, at about one byte per symbol, and rewritten with 
+    str.replace(), which works in C. To keep one rule from rewriting the 
+    output of another, each symbol with a rule is first replaced by a 
+    placeholder character outside the alphabet, and then each placeholder 
+    by its production. The result can be passed to turtle.mapActions() and 
+    turtle.segmentArray() like a list of symbols.
+    
+        >>> evaluateString("0", production("1->11", "0->1[0]0"), 2)
+        '11[1[0]0]1[0]0'
+    
+    Raises ValueError if some symbol isn't a one character string.
+    """
+    rules = _ruleDict(rules)
+    if not _isCharacterSystem(axiom, rules):
+        raise ValueError("evaluateString requires single character symbols")
+    productions = {S: "".join(Abc) for S, Abc in rules.items()}
+    productions = {S: Abc for S, Abc in productions.items() if Abc != S}
+    used = set(itertools.chain(axiom, productions, *productions.values()))
+    unused = (chr(i) for i in itertools.count() if chr(i) not in used)
+    placeholders = [(S, p, productions[S]) 
+                    for S, p in zip(productions, unused)]
+    
+    symbols = "".join(axiom)
+    for _ in range(n):
+        if len(placeholders) == 1:
+            S, _, Abc = placeholders[0]
+            symbols = symbols.replace(S, Abc)
+            continue
+        for S, p, _ in placeholders:
+            symbols = symbols.replace(S, p)
+        for _, p, Abc in placeholders:
+            symbols = symbols.replace(p, Abc)
+    return symbols
+
+def evaluateSystem(axiom, rules, n, compressed=False, stats=None, path=None):
     """Evaluates a regular bog-standard L-System.
     
     axiom is a sequence of symbols.
@@ -102,20 +303,85 @@ def evaluateSystem(axiom, rules, n):
         
         >>> evaluateSystem("0", production("1->11", "0->1[0]0"), 2)
         ['1', '1', '[', '1', '[', '0', ']', '0', ']', '1', '[', '0', ']', '0']
+
+    The whole generation is built in memory, see iterateSystem() for a 
+    streaming alternative.
+    
+    Internally the system is compiled to integer symbol IDs by CompiledSystem,
+    and the result is decoded back into a list of the original symbols. 
+    Systems whose symbols are all single characters are instead evaluated 
+    as strings by evaluateString(), which is much faster; see that function
+    to keep the result as a string.
+    
+    If compressed is True the result is instead a GenerationView, which 
+    shares the expansion of each (symbol, depth) pair and so uses memory in 
+    proportion to n and the size of the rules. It supports len(), iteration,
+    indexing, slicing and comparison with lists:
+    
+        >>> compressed = evaluateSystem("0", production("1->11", "0->1[0]0"), 2, 
+        ...                             compressed=True)
+        >>> compressed == evaluateSystem("0", production("1->11", "0->1[0]0"), 2)
+        True
+    
+    stats is an optional ulsys.stats.EvaluationStats, or any object with the 
+    same generation() method, which is told about each generation as it is 
+    evaluated. It is not used for compressed results.
+    
+    If path is given the generations are stored in that file rather than in
+    memory, and the result is a MappedGeneration, see evaluateToFile().
     """
-    if issubclass(type(rules), list):
-        rules = dict(rules)
-    if issubclass(type(rules), tuple):
-        rules = [rules]
+    rules = _ruleDict(rules)
+    if compressed:
+        from .view import GenerationView
+        return GenerationView(axiom, rules, n)
+    if path is not None:
+        from .mapped import evaluateToFile
+        return evaluateToFile(axiom, rules, n, path, stats=stats)
     if n < 1:
         return axiom
-    result = []
-    for x in axiom:
-        if x in rules:
-            result += rules[x]
+    if stats is None and _isCharacterSystem(axiom, rules):
+        return list(evaluateString(axiom, rules, n))
+    system = CompiledSystem(axiom, rules)
+    if stats is None:
+        return system.decode(system.evaluate(n))
+    ids = system.axiom
+    for k in range(1, n + 1):
+        start = time.perf_counter()
+        ids = system.step(ids)
+        seconds = time.perf_counter() - start
+        stats.generation(k, len(ids), seconds, system.histogram(ids))
+    return system.decode(ids)
+
+def iterateSystem(axiom, rules, n):
+    """Evaluates a standard L-System lazily, yielding one symbol at a time.
+    
+    Takes the same arguments as evaluateSystem() and produces the same 
+    symbols, but instead of building each generation in full, the axiom is 
+    expanded depth-first. Only one iterator per generation is kept alive, so 
+    memory use is proportional to n rather than to the length of the output.
+    
+    The result can be passed straight to turtle.mapActions().
+    
+        >>> list(iterateSystem("0", production("1->11", "0->1[0]0"), 2))
+        ['1', '1', '[', '1', '[', '0', ']', '0', ']', '1', '[', '0', ']', '0']
+        
+        >>> "".join(iterateSystem("F", production("F->F+F"), 3))
+        'F+F+F+F+F+F+F+F'
+    """
+    rules = _ruleDict(rules)
+    if n < 1:
+        yield from axiom
+        return
+    # stack[i] iterates over symbols belonging to generation i.
+    stack = [iter(axiom)]
+    while stack:
+        for x in stack[-1]:
+            if len(stack) <= n and x in rules:
+                stack.append(iter(rules[x]))
+                break
+            yield x
         else:
-            result.append(x)
-    return evaluateSystem(result, rules, n-1)
+            stack.pop()
 
 if __name__ == "__main__":
     import doctest
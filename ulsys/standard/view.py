@@ -0,0 +1,182 @@
+"""
+ulsys standard L-System random access views.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import bisect
+import itertools
+
+from .standard import _ruleDict, evaluateSystem, production
+
+__all__ = [
+    "GenerationView"
+]
+
+class GenerationView:
+    """A read-only, indexable view of generation n of a standard L-System.
+    
+    The generation is never materialized. Instead it is stored as a 
+    grammar-compressed DAG: a node is a symbol expanded d times, and its 
+    children are the nodes of its production's symbols expanded d-1 times, 
+    shared by every occurrence. For each node the lengths of the children are
+    tabulated as prefix sums, so memory grows with n and the size of the 
+    rules, not with the length of the output. Looking up symbol k descends 
+    through the DAG, one generation per step, so it takes O(n) steps no 
+    matter how long the output is.
+    
+    A view compares equal to any sequence with the same symbols, and to other
+    views of the same generation.
+    
+    axiom and rules are the same as for evaluateSystem().
+    
+        >>> view = GenerationView("0", production("1->11", "0->1[0]0"), 2)
+        >>> len(view)
+        14
+        >>> view[3], view[-1]
+        ('1', '0')
+        >>> view[2:9]
+        ['[', '1', '[', '0', ']', '0', ']']
+        >>> list(view) == evaluateSystem("0", production("1->11", "0->1[0]0"), 2)
+        True
+        
+    Works for generations far too large to ever evaluate:
+    
+        >>> view = GenerationView("F++F++F", production("F->F-F++F-F"), 60)
+        >>> view.length
+        9304595970494411110326649421962412032
+        >>> "".join(view[10**30:10**30 + 12])
+        '-F-F++F-F++F'
+    """
+    def __init__(self, axiom, rules, n):
+        self.axiom = list(axiom)
+        self.rules = _ruleDict(rules)
+        self.n = max(n, 0)
+        
+        # lengths[d] maps each symbol with a rule to its length after being 
+        # expanded d times, symbols without a rule always have length 1.
+        self._lengths = [{S: 1 for S in self.rules}]
+        # prefixes[d] maps each symbol with a rule to the prefix sums of the
+        # lengths of its production, each symbol expanded d-1 times.
+        self._prefixes = [None]
+        for d in range(1, self.n + 1):
+            below = self._lengths[-1]
+            lengths = dict()
+            prefixes = dict()
+            for S, Abc in self.rules.items():
+                prefix = [0]
+                prefix.extend(itertools.accumulate(below.get(x, 1) for x in Abc))
+                prefixes[S] = prefix
+                lengths[S] = prefix[-1]
+            self._lengths.append(lengths)
+            self._prefixes.append(prefixes)
+        
+        top = self._lengths[self.n]
+        self._axiomPrefix = [0]
+        self._axiomPrefix.extend(
+            itertools.accumulate(top.get(x, 1) for x in self.axiom))
+        self.length = self._axiomPrefix[-1]
+    
+    def __len__(self):
+        return self.length
+    
+    def __repr__(self):
+        return "GenerationView({!r}, {!r}, {!r})".format(
+            self.axiom, self.rules, self.n)
+    
+    def __eq__(self, other):
+        if isinstance(other, GenerationView):
+            same = (self.n, self.axiom, self.rules)
+            if same == (other.n, other.axiom, other.rules):
+                return True
+            if self.length != other.length:
+                return False
+        else:
+            try:
+                if self.length != len(other):
+                    return False
+            except TypeError:
+                return NotImplemented
+        return all(a == b for a, b in zip(self, other))
+    
+    __hash__ = None
+    
+    def _locate(self, k):
+        """Finds symbol k, returning a list of (symbols, i) pairs from the 
+        axiom downwards, such that symbols[i] contains position k."""
+        i = bisect.bisect_right(self._axiomPrefix, k) - 1
+        path = [(self.axiom, i)]
+        k -= self._axiomPrefix[i]
+        for d in range(self.n, 0, -1):
+            symbols, i = path[-1]
+            x = symbols[i]
+            if x not in self.rules:
+                break
+            prefix = self._prefixes[d][x]
+            i = bisect.bisect_right(prefix, k) - 1
+            k -= prefix[i]
+            path.append((self.rules[x], i))
+        return path
+    
+    def _index(self, k):
+        if k < 0:
+            k += self.length
+        if not 0 <= k < self.length:
+            raise IndexError("generation index out of range")
+        return k
+    
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            start, stop, step = k.indices(self.length)
+            if step == 1:
+                return list(itertools.islice(
+                    self._iterFrom(start), max(stop - start, 0)))
+            return [self[i] for i in range(start, stop, step)]
+        symbols, i = self._locate(self._index(k))[-1]
+        return symbols[i]
+    
+    def __iter__(self):
+        return self._iterFrom(0)
+    
+    def _iterFrom(self, k):
+        """Yields the symbols from position k onwards, expanding depth-first 
+        like iterateSystem()."""
+        if k >= self.length:
+            return
+        path = self._locate(k)
+        # stack[i] iterates over symbols belonging to generation i. The 
+        # deepest one starts at the symbol containing position k, the others
+        # just after the symbol that is being expanded below them.
+        stack = [itertools.islice(symbols, i + 1, None) for symbols, i in path]
+        symbols, i = path[-1]
+        stack[-1] = itertools.islice(symbols, i, None)
+        while stack:
+            for x in stack[-1]:
+                if len(stack) <= self.n and x in self.rules:
+                    stack.append(iter(self.rules[x]))
+                    break
+                yield x
+            else:
+                stack.pop()
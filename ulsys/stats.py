@@ -0,0 +1,109 @@
+"""
+ulsys instrumentation.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+__all__ = [
+    "EvaluationStats",
+    "TurtleStats"
+]
+
+class EvaluationStats:
+    """Collects statistics from evaluateSystem(), standard or stochastic, 
+    when passed as its stats argument.
+    
+    generation() is called once per generation, after it has been 
+    evaluated; by default it appends a dictionary with the arguments to 
+    generations. Override it to get a callback instead. When no stats object
+    is passed, the evaluators don't measure anything.
+    
+        >>> from ulsys import standard
+        >>> stats = EvaluationStats()
+        >>> _ = standard.evaluateSystem("0", standard.production("1->11", "0->1[0]0"), 2, stats=stats)
+        >>> [(g["n"], g["length"], g["histogram"]) for g in stats.generations]
+        [(1, 5, {'1': 1, '0': 2, '[': 1, ']': 1}), (2, 14, {'1': 4, '0': 4, '[': 3, ']': 3})]
+    """
+    def __init__(self):
+        self.generations = []
+    
+    def generation(self, n, length, seconds, histogram, rules=None):
+        """Records generation n. 
+        
+        length is its number of symbols, seconds the time taken to rewrite 
+        it from generation n-1 and histogram a dictionary symbol->count. For
+        stochastic systems rules is a dictionary mapping each symbol with 
+        rules to a list of (production, count) pairs, telling how many times
+        each of its rules fired; otherwise it is None.
+        """
+        self.generations.append({
+            "n": n,
+            "length": length,
+            "seconds": seconds,
+            "histogram": histogram,
+            "rules": rules
+        })
+    
+    @property
+    def seconds(self):
+        """The total time spent rewriting."""
+        return sum(g["seconds"] for g in self.generations)
+
+class TurtleStats:
+    """Collects statistics from mapActions() when passed as its stats 
+    argument.
+    
+    segments is the number of forward steps taken, maxDepth the deepest 
+    push/pop nesting reached, and counts and seconds map the name of each
+    kind of action (like "forward" or "push+rotate") to how many times it 
+    ran and the total time spent in it.
+    
+        >>> import math
+        >>> from ulsys import turtle
+        >>> stats = TurtleStats()
+        >>> _ = turtle.mapActions("F[+F[F]]F", {
+        ...     "F": turtle.TurtleAction.forward(),
+        ...     "+": turtle.TurtleAction.rotate(math.pi / 2),
+        ...     "[": turtle.TurtleAction.push(),
+        ...     "]": turtle.TurtleAction.pop()}, turtle.ArrayTurtle(), stats=stats)
+        >>> stats.segments, stats.maxDepth, stats.counts
+        (4, 2, {'forward': 4, 'push': 2, 'rotate': 1, 'pop': 2})
+    """
+    def __init__(self):
+        self.segments = 0
+        self.depth = 0
+        self.maxDepth = 0
+        self.counts = dict()
+        self.seconds = dict()
+    
+    def action(self, name, seconds, segments, depthChange):
+        """Records one action. segments is the number of forward steps it 
+        took and depthChange the number of pushes minus pops."""
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.segments += segments
+        self.depth += depthChange
+        if self.depth > self.maxDepth:
+            self.maxDepth = self.depth
@@ -1 +1,13 @@
-from .stochastic import *
\ No newline at end of file
+from .stochastic import *
+from .stochastic import __all__ as _eager
+from .._lazy import lazyModule
+
+_lazy = {
+    "growth": ["expectedGrowthMatrix", "expectedSymbolCounts", 
+               "expectedLength"],
+    "generations": ["Generations"],
+    "parallel": ["parallelEvaluateSystem", "evaluateVariants", 
+                 "iterateVariants"]
+}
+__all__ = _eager + [name for names in _lazy.values() for name in names]
+__getattr__, __dir__ = lazyModule(__name__, _lazy)
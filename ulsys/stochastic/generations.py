@@ -0,0 +1,100 @@
+"""
+ulsys stochastic L-System incremental evaluation.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import copy
+import random
+
+from .stochastic import (
+    CompiledSystem, _compileWithAxiom, _drawer, evaluateSystem, production)
+from ..standard.standard import _numpy
+from ..standard import generations
+
+__all__ = [
+    "Generations"
+]
+
+class Generations(generations.Generations):
+    """Evaluates a stochastic L-System incrementally, one generation at a 
+    time.
+    
+    Works like its sister class in the standard module, but the object also
+    holds the random source, so generation n+1 really grows out of 
+    generation n. With the same seed or rng, generation n is the same as 
+    what evaluateSystem() gives.
+    
+    rng and seed are the same as for evaluateSystem(), and rules may be a 
+    CompiledSystem as there. Evicted generations can only be recomputed if 
+    the random source is a random.Random or a numpy.random.Generator, whose
+    state is saved along with each cached generation; for other sources a 
+    LookupError is raised instead.
+    
+        >>> rules = production("X 0.5->F[+X]X", "X 0.5->F[-X]X", "F->FF")
+        >>> g = Generations("X", rules, seed=42)
+        >>> for n in range(4):
+        ...     _ = g.step()
+        >>> g.current == evaluateSystem("X", rules, 4, seed=42)
+        True
+        >>> g[2] == evaluateSystem("X", rules, 2, seed=42)
+        True
+        >>> Generations("XX", CompiledSystem("F", rules), seed=42).current
+        ['X', 'X']
+    """
+    def __init__(self, axiom, rules, rng=None, seed=None, cacheSize=8):
+        if seed is not None:
+            if rng is not None:
+                raise ValueError("only one of rng and seed can be given")
+            rng = random.Random(seed)
+        if rng is None:
+            rng = lambda: random.random()
+        self.rng = rng
+        self._draw = _drawer(rng)
+        super().__init__(axiom, rules, cacheSize)
+    
+    def _compile(self, axiom, rules):
+        return _compileWithAxiom(axiom, rules)
+    
+    def _snapshot(self):
+        numpy = _numpy()
+        if isinstance(self.rng, random.Random) or (
+                numpy is not None and 
+                isinstance(self.rng, numpy.random.Generator)):
+            return copy.deepcopy(self.rng)
+        return None
+    
+    def _advance(self, ids):
+        return self.system.step(ids, self._draw)
+    
+    def _replay(self, ids, count, state):
+        if state is None:
+            raise LookupError(
+                "the generation was evicted and the rng can't be replayed")
+        rng = copy.deepcopy(state)
+        draw = _drawer(rng)
+        for _ in range(count):
+            ids = self.system.step(ids, draw)
+        return ids, rng
@@ -0,0 +1,83 @@
+"""
+ulsys stochastic L-System growth analysis.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from .stochastic import _ruleLists, production
+from ..standard.growth import _alphabet, _countVector, _vectorTimesPower
+
+__all__ = [
+    "expectedGrowthMatrix",
+    "expectedSymbolCounts",
+    "expectedLength"
+]
+
+def expectedGrowthMatrix(axiom, rules):
+    """Builds the expected growth matrix of a stochastic L-System.
+    
+    Like growthMatrix() in the standard module, but M[i][j] is the expected 
+    number of times alphabet[j] occurs in whichever production replaces 
+    alphabet[i], with each rule weighted by its scaled probability.
+    
+    axiom and rules are the same as for evaluateSystem().
+    
+        >>> expectedGrowthMatrix("A", production("A 1->AB", "A 3->B"))
+        (['A', 'B'], [[0.25, 1.0], [0.0, 1.0]])
+    """
+    s_to_rules = _ruleLists(rules)
+    alphabet = _alphabet(
+        axiom, {S: [Abc for R, Abc in r] for S, r in s_to_rules.items()})
+    M = []
+    for x in alphabet:
+        if x not in s_to_rules:
+            M.append([float(c) for c in _countVector([x], alphabet)])
+            continue
+        prob_total = sum(R for R, Abc in s_to_rules[x])
+        row = [0.0] * len(alphabet)
+        for R, Abc in s_to_rules[x]:
+            for j, c in enumerate(_countVector(Abc, alphabet)):
+                row[j] += c * R / prob_total
+        M.append(row)
+    return list(alphabet), M
+
+def expectedSymbolCounts(axiom, rules, n):
+    """Computes the expected number of times each symbol occurs in generation
+    n, without evaluating the system. Returns a dictionary symbol->float.
+    
+        >>> expectedSymbolCounts("A", production("A 0.5->AA", "A 0.5->A"), 4)
+        {'A': 5.0625}
+    """
+    alphabet, M = expectedGrowthMatrix(axiom, rules)
+    v = _countVector(axiom, dict(zip(alphabet, range(len(alphabet)))))
+    return dict(zip(alphabet, _vectorTimesPower(v, M, max(n, 0))))
+
+def expectedLength(axiom, rules, n):
+    """Returns the expected number of symbols in generation n.
+    
+        >>> expectedLength("A", production("A 0.5->AB", "A 0.5->B"), 3)
+        1.875
+    """
+    return sum(expectedSymbolCounts(axiom, rules, n).values())
@@ -0,0 +1,210 @@
+"""
+ulsys stochastic L-System parallel evaluation.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import random
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker, shared_memory
+
+from .stochastic import (
+    CompiledSystem, _compileWithAxiom, _drawer, evaluateSystem, production)
+from ..standard.standard import _numpy
+from ..standard import parallel
+from ..standard.parallel import _initWorker, _splitGeneration
+
+__all__ = [
+    "parallelEvaluateSystem",
+    "evaluateVariants",
+    "iterateVariants"
+]
+
+def _childSeed(seed, i):
+    """Derives the seed of chunk i from seed, the same on every platform."""
+    digest = hashlib.sha256("{!r}/{}".format(seed, i).encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def _expandChunk(ids, depth, seed):
+    """Worker: expands ids depth times with its own random.Random(seed). 
+    Returns the name and length of a new shared buffer holding the result."""
+    system = parallel._system
+    result = system.evaluate(depth, random.Random(seed), system._asIds(ids))
+    data = memoryview(result).cast("B")
+    shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    # The parent unlinks the buffer, so it is the one tracking it.
+    resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        shm.buf[:len(data)] = data
+    finally:
+        shm.close()
+    return shm.name, len(result)
+
+def parallelEvaluateSystem(axiom, rules, n, seed, processes=None, chunks=64):
+    """Evaluates a stochastic L-System on several processes.
+    
+    Works like its sister function in the standard module: the first 
+    generation k with at least chunks symbols is evaluated here, with a 
+    random.Random(seed), and split into chunks contiguous pieces that a 
+    process pool expands to generation n. Each piece gets its own random 
+    source, seeded from seed and the piece's index, so the result depends on
+    seed and chunks but not on the number of processes. It is not the same 
+    as what evaluateSystem() gives for the same seed.
+    
+    The pieces come back in shared memory buffers, which are decoded in 
+    order into the resulting list.
+    
+        >>> rules = production("X 0.5->F[+X]X", "X 0.5->F[-X]X", "F->FF")
+        >>> a = parallelEvaluateSystem("X", rules, 7, seed=1, processes=1)
+        >>> b = parallelEvaluateSystem("X", rules, 7, seed=1, processes=3)
+        >>> a == b
+        True
+    """
+    if n < 1:
+        return axiom
+    if processes is None:
+        processes = os.cpu_count() or 1
+    system = _compileWithAxiom(axiom, rules)
+    draw = _drawer(random.Random(seed))
+    k, ids, ranges = _splitGeneration(
+        system, n, chunks, lambda ids: system.step(ids, draw))
+    if k == n:
+        return system.decode(ids)
+    
+    numpy = _numpy()
+    result = []
+    futures = []
+    # Names of the buffers already read and unlinked.
+    unlinked = set()
+    try:
+        with ProcessPoolExecutor(processes, initializer=_initWorker, 
+                                 initargs=(system,)) as pool:
+            futures = [
+                pool.submit(_expandChunk, ids[start:stop], n - k, 
+                            _childSeed(seed, i))
+                for i, (start, stop) in enumerate(ranges)
+            ]
+            for f in futures:
+                name, length = f.result()
+                shm = shared_memory.SharedMemory(name=name)
+                try:
+                    if numpy is not None:
+                        chunk = numpy.frombuffer(shm.buf, dtype=system._dtype,
+                                                 count=length)
+                    else:
+                        chunk = shm.buf[:length * system.axiom.itemsize].cast(
+                            system.typecode)
+                    result.extend(system.decode(chunk))
+                    del chunk
+                finally:
+                    shm.close()
+                    shm.unlink()
+                    unlinked.add(name)
+    finally:
+        # The workers don't track their buffers, so if anything went wrong 
+        # the ones not read yet must be unlinked here or they leak.
+        for f in futures:
+            if f.done() and not f.cancelled() and f.exception() is None:
+                name = f.result()[0]
+                if name not in unlinked:
+                    _unlink(name)
+    return result
+
+def _unlink(name):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+def _evaluateVariant(n, seed):
+    """Worker: evaluates the compiled system with random.Random(seed)."""
+    system = parallel._system
+    return seed, system.evaluate(n, random.Random(seed))
+
+def iterateVariants(axiom, rules, n, seeds=None, count=None, baseSeed=0, 
+                    processes=None):
+    """Evaluates many variants of a stochastic L-System, one per seed, on 
+    several processes. Yields (seed, symbols) pairs as variants finish, which
+    is not necessarily in the order of seeds.
+    
+    The rules are compiled once and shared by all variants, and the symbols 
+    of a variant are the same as evaluateSystem(axiom, rules, n, seed=seed)
+    gives. Either give seeds, a list of seeds, or count, in which case the 
+    seeds are baseSeed, baseSeed + 1, ..., baseSeed + count - 1. processes
+    defaults to the number of CPUs; with 1, everything runs in this process.
+    
+        >>> rules = production("X 0.5->F[+X]X", "X 0.5->F[-X]X", "F->FF")
+        >>> sorted(seed for seed, symbols in iterateVariants("X", rules, 3, count=3))
+        [0, 1, 2]
+    
+    rules may be a CompiledSystem, as for evaluateSystem().
+    
+        >>> list(iterateVariants("FF", CompiledSystem("X", rules), 1, seeds=[1]))
+        [(1, ['F', 'F', 'F', 'F'])]
+    """
+    if seeds is None:
+        if count is None:
+            raise ValueError("either seeds or count must be given")
+        seeds = range(baseSeed, baseSeed + count)
+    if n < 1:
+        for seed in seeds:
+            yield seed, axiom
+        return
+    if processes is None:
+        processes = os.cpu_count() or 1
+    system = _compileWithAxiom(axiom, rules)
+    if processes == 1:
+        for seed in seeds:
+            yield seed, system.decode(system.evaluate(n, random.Random(seed)))
+        return
+    with ProcessPoolExecutor(processes, initializer=_initWorker, 
+                             initargs=(system,)) as pool:
+        futures = [pool.submit(_evaluateVariant, n, seed) for seed in seeds]
+        for f in as_completed(futures):
+            seed, ids = f.result()
+            yield seed, system.decode(ids)
+
+def evaluateVariants(axiom, rules, n, seeds=None, count=None, baseSeed=0, 
+                     processes=None):
+    """Like iterateVariants(), but returns a list of the variants in the 
+    order of the seeds.
+    
+        >>> rules = production("X 0.5->F[+X]X", "X 0.5->F[-X]X", "F->FF")
+        >>> variants = evaluateVariants("X", rules, 4, seeds=[7, 8], processes=2)
+        >>> variants[1] == evaluateSystem("X", rules, 4, seed=8)
+        True
+    """
+    if seeds is None:
+        if count is None:
+            raise ValueError("either seeds or count must be given")
+        seeds = range(baseSeed, baseSeed + count)
+    seeds = list(seeds)
+    results = dict(iterateVariants(axiom, rules, n, seeds, 
+                                   processes=processes))
+    return [results[seed] for seed in seeds]
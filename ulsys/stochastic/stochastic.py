@@ -27,10 +27,17 @@ SOFTWARE.
 """
 
 import re
+import copy
+import time
+import bisect
 import random
 import itertools
+from array import array
+from collections import Counter
 
-__all__ = ["production", "evaluateSystem"]
+from ..standard import standard
+
+__all__ = ["CompiledSystem", "production", "evaluateSystem"]
 
 _prodre = re.compile("^([^->])(\s+[0-9]+(\.[0-9]*)?)?\s*->([^\s]+)$")
 
@@ -89,7 +96,174 @@ def production(*args):
         return res[0]
     return res
 
-def evaluateSystem(axiom, rules, n, rng=None):
+def _ruleLists(rules):
+    """Normalizes any of the rule formats accepted by evaluateSystem to a
+    dictionary S->[(R, Symbols)]."""
+    rtype = type(rules)
+    if issubclass(rtype, dict):
+        return rules
+    if issubclass(rtype, tuple):
+        rules = [rules]
+        rtype = type(rules)
+    if not issubclass(rtype, list):
+        raise TypeError("rules is of an unsupported type {}".format(rtype))
+    s_to_rules = dict()
+    for S, R, Abc, *t in rules:
+        if S in s_to_rules:
+            s_to_rules[S].append((R, Abc))
+        else:
+            s_to_rules[S] = [(R, Abc)]
+    return s_to_rules
+
+def _drawer(rng):
+    """Returns a function k -> k random floats in [0, 1) taken from rng."""
+    numpy = standard._numpy()
+    if numpy is not None and isinstance(rng, numpy.random.Generator):
+        return rng.random
+    if isinstance(rng, random.Random):
+        rng = rng.random
+    if not callable(rng):
+        raise TypeError("rng is supposed to be callable")
+    return lambda k: [rng() for _ in range(k)]
+
+class CompiledSystem(standard.CompiledSystem):
+    """A stochastic L-System compiled to integer-coded selection tables.
+    
+    Like its sister class in the standard module, symbols are mapped to 
+    integer IDs and generations are stored as arrays of IDs. For every symbol 
+    the rules are sorted by probability once, and their scaled cumulative 
+    weights are kept in a table, so selecting a rule is a binary search 
+    (vectorized over a whole generation when NumPy is installed).
+    
+        >>> system = CompiledSystem("A", production("A 1->BA", "A 3->C"))
+        >>> system.weights[0]
+        [0.25, 1.0]
+        >>> system.decode(system.evaluate(2, lambda: 0.1))
+        ['B', 'B', 'A']
+    """
+    def __init__(self, axiom, rules):
+        s_to_rules = _ruleLists(rules)
+        symbols = [S for S in s_to_rules]
+        for current_rules in s_to_rules.values():
+            for R, Abc in current_rules:
+                symbols.extend(Abc)
+        symbols.extend(axiom)
+        self._compileAlphabet(symbols)
+        
+        # Production index i < len(alphabet) is the identity production of 
+        # symbol i, the productions of the rules follow after those.
+        productions = [
+            array(self.typecode, [i]) for i in range(len(self.alphabet))
+        ]
+        # For the ID of each symbol with rules: the cumulative weights of its
+        # rules, and the production index of each rule, in the same order.
+        self.weights = dict()
+        self.choices = dict()
+        for S, current_rules in s_to_rules.items():
+            # Sort by probability
+            current_rules = sorted(current_rules, key=lambda x: x[0])
+            # The total probability for all the rules for the given S
+            prob_total = sum((R for R, Abc in current_rules))
+            if not prob_total > 0:
+                raise ValueError(
+                    "the probabilities for symbol {} sum to {}".format(
+                        S, prob_total))
+            i = self._ids[(type(S), S)]
+            self.weights[i] = list(itertools.accumulate(
+                R/prob_total for R, Abc in current_rules))
+            self.choices[i] = list(range(
+                len(productions), len(productions) + len(current_rules)))
+            productions.extend(self.encode(Abc) for R, Abc in current_rules)
+        
+        self.productions = productions
+        self._table = standard._ProductionTable(productions, self.typecode)
+        self.axiom = self._asIds(self.encode(axiom))
+        numpy = standard._numpy()
+        if numpy is not None:
+            self._weights = {i: numpy.array(w) for i, w in self.weights.items()}
+            self._choices = {i: numpy.array(c) for i, c in self.choices.items()}
+    
+    def select(self, i, p):
+        """Returns the production index picked for symbol ID i by the random 
+        value p."""
+        weights = self.weights[i]
+        return self.choices[i][min(bisect.bisect_left(weights, p), 
+                                   len(weights) - 1)]
+    
+    def step(self, ids, draw):
+        """Rewrites a generation of IDs once, returning the next generation.
+        
+        draw is a function k -> k random floats, as used by evaluateSystem.
+        Every symbol that has rules consumes one value, in order.
+        """
+        return self._table.expand(self._pick(ids, draw))
+    
+    def firedRules(self, keys):
+        """Counts how many times each rule was picked, given the production 
+        indices picked for a generation. Returns a dictionary mapping each 
+        symbol with rules to a list of (production, count) pairs."""
+        numpy = standard._numpy()
+        if numpy is not None:
+            counts = numpy.bincount(
+                keys, minlength=len(self.productions)).tolist()
+        else:
+            counts = Counter(keys)
+        return {
+            self.alphabet[i]: [
+                (self.decode(self.productions[c]), counts[c]) 
+                for c in self.choices[i]
+            ]
+            for i in self.choices
+        }
+    
+    def _pick(self, ids, draw):
+        """Returns the index of the production that replaces each symbol."""
+        ids = self._asIds(ids)
+        weights = self.weights
+        numpy = standard._numpy()
+        if numpy is not None:
+            keys = ids.astype(numpy.intp)
+            has_rules = numpy.isin(ids, list(weights))
+            p = numpy.asarray(draw(int(numpy.count_nonzero(has_rules))))
+            ruled = ids[has_rules]
+            picked = numpy.empty(len(ruled), dtype=numpy.intp)
+            for i in weights:
+                mask = ruled == i
+                if mask.any():
+                    w = self._weights[i]
+                    index = numpy.searchsorted(w, p[mask], side="left")
+                    picked[mask] = self._choices[i][
+                        numpy.minimum(index, len(w) - 1)]
+            keys[has_rules] = picked
+        else:
+            p = iter(draw(sum(1 for i in ids if i in weights)))
+            select = self.select
+            keys = [select(i, next(p)) if i in weights else i for i in ids]
+        return keys
+    
+    def evaluate(self, n, rng, ids=None):
+        """Returns generation n, starting from ids or the axiom if ids is None.
+        
+        rng is any of the random sources accepted by evaluateSystem.
+        """
+        draw = _drawer(rng)
+        if ids is None:
+            ids = self.axiom
+        for _ in range(n):
+            ids = self.step(ids, draw)
+        return ids
+
+def _compileWithAxiom(axiom, rules):
+    """Compiles rules, starting from axiom. If rules is already a 
+    CompiledSystem, returns a copy of it starting from axiom instead, which 
+    must only contain symbols known to it."""
+    if isinstance(rules, CompiledSystem):
+        system = copy.copy(rules)
+        system.axiom = system._asIds(system.encode(axiom))
+        return system
+    return CompiledSystem(axiom, rules)
+
+def evaluateSystem(axiom, rules, n, rng=None, seed=None, stats=None):
     """Evaluates a stochastic system. 
     
     A stochastic system consists of an axiom, an alphabet and the rules. In this
@@ -127,69 +301,56 @@ def evaluateSystem(axiom, rules, n, rng=None):
     n is the number of iterations.
     
     rng is an optional value that is expected to be either None, or a function
-    that returns a floating point value between 0 and 1.
+    that returns a floating point value between 0 and 1. A random.Random 
+    instance, or a numpy.random.Generator which is asked for all the draws of 
+    a generation in a single call, is also accepted.
+    
+    seed is an optional seed for a new random.Random, a convenient way to get 
+    reproducible output without supplying an rng. It cannot be combined with 
+    rng.
+    
+    rules may also be a CompiledSystem, in which case the axiom must only 
+    contain symbols known to it.
+    
+    stats is an optional ulsys.stats.EvaluationStats, or any object with the 
+    same generation() method, which is told about each generation as it is 
+    evaluated, including how many times each rule fired.
     
     >>> evaluateSystem("AA", production("A 0.5->BA", "A 0.5->C"), 2, rng=lambda: 0.5)
     ['B', 'B', 'A', 'B', 'B', 'A']
+    
+    >>> rules = production("A 0.5->BA", "A 0.5->C")
+    >>> evaluateSystem("A", rules, 8, seed=3) == evaluateSystem("A", rules, 8, seed=3)
+    True
     """ 
+    if seed is not None:
+        if rng is not None:
+            raise ValueError("only one of rng and seed can be given")
+        rng = random.Random(seed)
     if rng is None:
         rng = lambda: random.random()
-    if not callable(rng):
-        raise TypeError("rng is supposed to be callable")
+    draw = _drawer(rng)
     
-    s_to_rules = dict()
-    rtype = type(rules)
-    
-    if issubclass(rtype, dict):
-        s_to_rules = rules
+    if n < 1:
+        return axiom
+    if isinstance(rules, CompiledSystem):
+        system = rules
+        ids = system.encode(axiom)
     else:
-        if issubclass(rtype, tuple):
-            rules = [rules]
-            rtype = type(rules)
-        
-        if issubclass(rtype, list):
-            for S, R, Abc, *t in rules:
-                if S in s_to_rules:
-                    s_to_rules[S].append((R, Abc))
-                else:
-                    s_to_rules[S] = [(R, Abc)]
-        else:
-            raise TypeError("rules is of an unsupported type {}".format(rtype))
-    
-    # Recursive implementation. To speed things up we avoid the above checks.
-    def impl(curr_axiom, curr_n):
-        if curr_n < 1:
-            return curr_axiom
-        newaxiom = []
-        # Replace each symbol in the axiom
-        for S in curr_axiom:
-            if S in s_to_rules:
-                # Todo: These steps could be moved out of the loop!
-                # Sort by probability
-                current_rules = sorted(s_to_rules[S], key=lambda x: x[0])
-                # The total probability for all the rules for the given S
-                prob_total = sum((R for R, Abc in current_rules))
-                
-                # Construct a list of weights, ordered and scaled by total
-                weights = [R/prob_total for R, Abc in current_rules]
-                weights_acc = list(itertools.accumulate(weights))
-                p = rng()
-                
-                selected_rule = None
-                last_w = 0
-                for i,w in zip(range(0, len(weights_acc)), weights_acc):
-                    if p >= last_w and p <= w:
-                        selected_rule = current_rules[i]
-                        break
-                    else:
-                        last_w = w
-                _, Abc = selected_rule
-                newaxiom.extend(Abc)
-            else:
-                newaxiom.append(S)
-                continue
-        return impl(newaxiom, curr_n - 1)
-    return impl(axiom, n)
+        system = CompiledSystem(axiom, rules)
+        ids = system.axiom
+    if stats is None:
+        for _ in range(n):
+            ids = system.step(ids, draw)
+        return system.decode(ids)
+    for k in range(1, n + 1):
+        start = time.perf_counter()
+        keys = system._pick(ids, draw)
+        ids = system._table.expand(keys)
+        seconds = time.perf_counter() - start
+        stats.generation(k, len(ids), seconds, system.histogram(ids), 
+                         system.firedRules(keys))
+    return system.decode(ids)
 
 if __name__ == "__main__":
     import doctest
@@ -1 +1,23 @@
-from .turtle import *
\ No newline at end of file
+from importlib.util import find_spec as _findSpec
+
+from .turtle import *
+from .turtle import __all__ as _eager
+from .._lazy import lazyModule
+
+# The backends, most of which use NumPy, and PyX for PyXTurtle, are loaded
+# on first use.
+_lazy = {
+    "segments": ["segmentArray"],
+    "buffers": ["ArrayTurtle"],
+    "svg": ["SVGTurtle"],
+    "dispatch": ["CompiledActions", "compileActions"],
+    "simplify": ["simplifySegments", "simplifyPolylines"],
+    "raster": ["Canvas", "RasterTurtle", "writePNG"],
+    "spatial": ["SegmentGrid", "segmentBounds", "cullSegments"],
+    "pyxturtle": ["PyXTurtle"]
+}
+# PyXTurtle only exists with PyX, which can be looked for without being 
+# imported.
+__all__ = _eager + [name for names in _lazy.values() for name in names 
+                    if name != "PyXTurtle" or _findSpec("pyx")]
+__getattr__, __dir__ = lazyModule(__name__, _lazy)
@@ -0,0 +1,183 @@
+"""
+ulsys array-backed turtle.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .turtle import BaseTurtle, TurtleAction, mapActions, _vec2
+
+__all__ = [
+    "ArrayTurtle"
+]
+
+class ArrayTurtle(BaseTurtle):
+    """A turtle that records its drawing in flat arrays instead of objects.
+    
+    The position and heading are plain floats, saved states live in an 
+    array('d') stack, and the drawing is kept as a vertex buffer (x, y pairs
+    in an array('d')) plus an index buffer (pairs of vertex indices in an 
+    array('L'), one pair per segment). The buffers grow geometrically as they
+    are appended to, so drawing allocates no Python objects per step.
+    
+    A vertex is shared by consecutive segments, and a new one is only added 
+    at the start of a line after a pop. Other kinds of output, such as a 
+    PyX path, are built from the buffers at export time. The extents of the
+    vertices, xmin, ymin, xmax and ymax, are kept up to date as the turtle
+    draws.
+    
+        >>> t = ArrayTurtle()
+        >>> _ = mapActions("F[+F]F", {
+        ...     "F": TurtleAction.forward(),
+        ...     "+": TurtleAction.rotate(-math.pi / 2),
+        ...     "[": TurtleAction.push(),
+        ...     "]": TurtleAction.pop()}, t)
+        >>> len(t), len(t.vertices) // 2
+        (3, 4)
+        >>> [[(round(x, 6), round(y, 6)) for x, y in line] for line in t.polylines()]
+        [[(0.0, 0.0), (0.0, 1.0), (1.0, 1.0)], [(0.0, 1.0), (0.0, 2.0)]]
+        >>> [round(x, 6) for x in t.bounds]
+        [0.0, 0.0, 1.0, 2.0]
+    """
+    def __init__(self, pos=_vec2(0, 0), angle=math.pi/2):
+        self.x = float(pos.x)
+        self.y = float(pos.y)
+        self.angle = angle
+        self.vertices = array("d", (self.x, self.y))
+        self.xmin = self.xmax = self.x
+        self.ymin = self.ymax = self.y
+        self.indices = array("L")
+        # Index of the vertex at the current position, or -1 if the 
+        # position hasn't been stored as a vertex.
+        self._vertex = 0
+        self._states = array("d")
+    
+    @property
+    def pos(self):
+        return _vec2(self.x, self.y)
+    
+    @pos.setter
+    def pos(self, pos):
+        self.x = float(pos.x)
+        self.y = float(pos.y)
+        self._vertex = -1
+    
+    def __len__(self):
+        """The number of segments drawn."""
+        return len(self.indices) // 2
+    
+    @property
+    def bounds(self):
+        """The extents of the drawing as (xmin, ymin, xmax, ymax)."""
+        return self.xmin, self.ymin, self.xmax, self.ymax
+    
+    def _extend(self, x, y):
+        if x < self.xmin:
+            self.xmin = x
+        elif x > self.xmax:
+            self.xmax = x
+        if y < self.ymin:
+            self.ymin = y
+        elif y > self.ymax:
+            self.ymax = y
+    
+    def forward(self, scale=1.0):
+        start = self._vertex
+        if start < 0:
+            start = len(self.vertices) // 2
+            self.vertices.append(self.x)
+            self.vertices.append(self.y)
+            self._extend(self.x, self.y)
+        x = self.x = self.x + math.cos(self.angle) * scale
+        y = self.y = self.y + math.sin(self.angle) * scale
+        # Inlined _extend(), this being the hot path.
+        if x < self.xmin:
+            self.xmin = x
+        elif x > self.xmax:
+            self.xmax = x
+        if y < self.ymin:
+            self.ymin = y
+        elif y > self.ymax:
+            self.ymax = y
+        self._vertex = len(self.vertices) // 2
+        self.vertices.append(x)
+        self.vertices.append(y)
+        self.indices.append(start)
+        self.indices.append(self._vertex)
+    
+    def rotate(self, rad):
+        self.angle += rad
+    
+    def push(self):
+        self._states.extend((self.x, self.y, self.angle, self._vertex))
+    
+    def pop(self):
+        self.x, self.y, self.angle, vertex = self._states[-4:]
+        del self._states[-4:]
+        self._vertex = int(vertex)
+    
+    def polylines(self):
+        """Yields the drawing as lists of (x, y) points, a new list starting
+        whenever a segment doesn't continue from the end of the previous 
+        one."""
+        v = self.vertices
+        i = self.indices
+        line = []
+        last = -1
+        for k in range(0, len(i), 2):
+            a, b = i[k], i[k + 1]
+            if a != last:
+                if line:
+                    yield line
+                line = [(v[2*a], v[2*a + 1])]
+            line.append((v[2*b], v[2*b + 1]))
+            last = b
+        if line:
+            yield line
+    
+    def toArray(self):
+        """Returns the segments as a NumPy array of shape (N, 2, 2), like 
+        segmentArray(). Requires NumPy."""
+        if numpy is None:
+            raise ImportError("toArray requires NumPy")
+        vertices = numpy.frombuffer(self.vertices, dtype=numpy.float64)
+        indices = numpy.frombuffer(self.indices, dtype=numpy.dtype("L"))
+        return vertices.reshape(-1, 2)[indices.reshape(-1, 2)]
+    
+    def pyxPath(self):
+        """Builds a PyX path of the drawing. Requires PyX."""
+        from pyx import path
+        items = []
+        for line in self.polylines():
+            items.append(path.moveto(*line[0]))
+            items.extend(path.lineto(x, y) for x, y in line[1:])
+        return path.path(*items)
@@ -0,0 +1,105 @@
+"""
+ulsys PyX turtle. Kept apart from the other turtles so that PyX is only 
+imported when it is used.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from .turtle import BaseTurtle
+
+# PyXTurtle only exists if PyX can be imported.
+__all__ = []
+
+try:
+    from pyx import *
+    
+    class PyXTurtle(BaseTurtle):
+        """A turtle that draws PyX paths and circles.
+        
+        The extents of the drawing, xmin, ymin, xmax and ymax, are kept up 
+        to date as the turtle draws, circles included, so the bounding box 
+        is known without walking paths.
+        
+            >>> import math
+            >>> t = PyXTurtle()
+            >>> t.forward(); t.rotate(-math.pi / 2); t.forward()
+            >>> t.circle(0.5)
+            >>> [round(x, 6) for x in t.bounds]
+            [0.0, 0.0, 1.5, 1.5]
+        """
+        def __init__(self):
+            super().__init__()
+            self.paths = []
+            self.states = []
+            self.paths.append(path.moveto(0, 0))
+            self.circles = []
+            self.xmin = self.xmax = float(self.pos.x)
+            self.ymin = self.ymax = float(self.pos.y)
+        
+        @property
+        def bounds(self):
+            """The extents of the drawing as (xmin, ymin, xmax, ymax)."""
+            return self.xmin, self.ymin, self.xmax, self.ymax
+        
+        def forward(self, scale=1.0):
+            super().forward(scale)
+            x, y = self.pos.x, self.pos.y
+            self.paths.append(path.lineto(x, y))
+            if x < self.xmin:
+                self.xmin = x
+            elif x > self.xmax:
+                self.xmax = x
+            if y < self.ymin:
+                self.ymin = y
+            elif y > self.ymax:
+                self.ymax = y
+        
+        def rotate(self, rad):
+            super().rotate(rad)
+        
+        def push(self):
+            self.states.append((self.pos, self.angle))
+        
+        def linewidth(self, width):
+            path.moveto(0,0) #IMPLEMENT
+        
+        def pop(self):
+            pos, angle = self.states.pop()
+            self.pos = pos
+            self.angle = angle
+            self.paths.append(path.moveto(pos.x, pos.y))
+        
+        def circle(self, r):
+            x, y = self.pos.x, self.pos.y
+            self.circles.append(path.circle(x, y, r))
+            self.xmin = min(self.xmin, x - r)
+            self.ymin = min(self.ymin, y - r)
+            self.xmax = max(self.xmax, x + r)
+            self.ymax = max(self.ymax, y + r)
+    
+    __all__.append("PyXTurtle")
+            
+except ImportError:
+    pass
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""
+ulsys raster turtle and canvas.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+import struct
+import zlib
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .turtle import mapActions, _vec2
+from .buffers import ArrayTurtle
+
+__all__ = [
+    "Canvas",
+    "RasterTurtle",
+    "writePNG"
+]
+
+class Canvas:
+    """A grayscale image that line segments are added onto.
+    
+    The image is a float64 NumPy array of shape (height, width), where each
+    segment adds weight to the pixels it crosses, so drawing many turtles on
+    the same canvas composites them additively: pixels covered by many 
+    drawings end up brighter. Segments are rasterized in batches, by 
+    sampling every segment at steps of at most a pixel and accumulating the
+    pixels each segment covers with numpy.bincount().
+    
+    bounds is (xmin, ymin, xmax, ymax) in turtle units, the area that is 
+    mapped to the image with the aspect ratio kept and a margin of margin 
+    pixels. If it is None, it is fitted to the first segments drawn.
+    Requires NumPy.
+    
+        >>> canvas = Canvas(8, 4, bounds=(0, 0, 3, 1), margin=0)
+        >>> canvas.draw([((0, 0), (3, 0)), ((0, 0), (0, 1))])
+        >>> (canvas.image > 0).astype(int)
+        array([[1, 0, 0, 0, 0, 0, 0, 0],
+               [1, 0, 0, 0, 0, 0, 0, 0],
+               [1, 0, 0, 0, 0, 0, 0, 0],
+               [1, 1, 1, 1, 1, 1, 1, 1]])
+        >>> canvas = Canvas(8, 1, bounds=(0, 0, 7, 0), margin=0)
+        >>> canvas.draw([((0, 0), (2.4, 0)), ((5, 0), (5.4, 0))])
+        >>> canvas.image
+        array([[1., 1., 1., 0., 0., 1., 0., 0.]])
+    """
+    def __init__(self, width, height, bounds=None, margin=1):
+        if numpy is None:
+            raise ImportError("Canvas requires NumPy")
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.image = numpy.zeros((height, width))
+        self.bounds = None
+        if bounds is not None:
+            self.fit(bounds)
+    
+    def fit(self, bounds):
+        """Sets the area mapped to the image, see Canvas."""
+        xmin, ymin, xmax, ymax = map(float, bounds)
+        self.bounds = (xmin, ymin, xmax, ymax)
+        w = max(self.width - 1 - 2 * self.margin, 1)
+        h = max(self.height - 1 - 2 * self.margin, 1)
+        self.scale = min(w / ((xmax - xmin) or 1.0), h / ((ymax - ymin) or 1.0))
+        # Centers the drawing.
+        self.offsetX = self.margin + (w - (xmax - xmin) * self.scale) / 2
+        self.offsetY = self.margin + (h - (ymax - ymin) * self.scale) / 2
+    
+    def draw(self, segments, weight=1.0, batchSize=1 << 16):
+        """Adds segments, an array of shape (N, 2, 2) like the one returned 
+        by segmentArray(), or anything that converts to one. Each pixel a 
+        segment crosses gains weight."""
+        segments = numpy.asarray(segments, dtype=numpy.float64).reshape(-1, 2, 2)
+        if not len(segments):
+            return
+        if self.bounds is None:
+            points = segments.reshape(-1, 2)
+            self.fit(tuple(points.min(axis=0)) + tuple(points.max(axis=0)))
+        for start in range(0, len(segments), batchSize):
+            self._draw(segments[start:start + batchSize], weight)
+    
+    def _draw(self, segments, weight):
+        xmin, ymin = self.bounds[:2]
+        # Pixel coordinates, with y pointing down.
+        x = (segments[:, :, 0] - xmin) * self.scale + self.offsetX
+        y = self.height - 1 - ((segments[:, :, 1] - ymin) * self.scale 
+                               + self.offsetY)
+        dx = x[:, 1] - x[:, 0]
+        dy = y[:, 1] - y[:, 0]
+        samples = numpy.ceil(numpy.maximum(abs(dx), abs(dy))).astype(numpy.intp) + 1
+        owner = numpy.repeat(numpy.arange(len(segments)), samples)
+        # Sample i of a segment lies at t = i / (samples - 1) along it.
+        offsets = numpy.cumsum(samples) - samples
+        t = numpy.arange(len(owner)) - offsets[owner]
+        t = t / numpy.maximum(samples - 1, 1)[owner]
+        px = numpy.rint(x[owner, 0] + dx[owner] * t).astype(numpy.intp)
+        py = numpy.rint(y[owner, 0] + dy[owner] * t).astype(numpy.intp)
+        # Neighbouring samples of a segment often round to the same pixel, 
+        # which must only gain weight once. Samples move monotonically along
+        # the segment, so repeats are always adjacent.
+        repeated = numpy.zeros(len(owner), dtype=bool)
+        repeated[1:] = ((owner[1:] == owner[:-1]) & (px[1:] == px[:-1]) 
+                        & (py[1:] == py[:-1]))
+        inside = ((px >= 0) & (px < self.width) & (py >= 0) 
+                  & (py < self.height) & ~repeated)
+        pixels = py[inside] * self.width + px[inside]
+        if not len(pixels):
+            return
+        # Only the range of pixels covered is counted, so that small 
+        # drawings on a large canvas stay cheap.
+        first = pixels.min()
+        counts = numpy.bincount(pixels - first)
+        flat = self.image.reshape(-1)
+        flat[first:first + len(counts)] += counts * weight
+    
+    def add(self, turtle, weight=1.0):
+        """Draws what an ArrayTurtle has drawn."""
+        self.draw(turtle.toArray(), weight)
+    
+    def toImage(self, maximum=None, invert=True):
+        """Returns the image as 8 bit grayscale, a uint8 array of shape 
+        (height, width). Values are scaled so that maximum, by default the 
+        largest value in the image, is full intensity. If invert is True 
+        the drawing is dark on a white background."""
+        if maximum is None:
+            maximum = self.image.max()
+        scaled = self.image / (maximum or 1.0)
+        image = numpy.rint(numpy.clip(scaled, 0.0, 1.0) * 255).astype(numpy.uint8)
+        if invert:
+            image = 255 - image
+        return image
+    
+    def writePNG(self, f, maximum=None, invert=True):
+        """Writes toImage() as a PNG to f, a binary file-like object."""
+        writePNG(f, self.toImage(maximum, invert))
+
+class RasterTurtle(ArrayTurtle):
+    """An ArrayTurtle that draws on a Canvas.
+    
+    If the canvas has bounds, the segments are rasterized chunkSize at a 
+    time as the turtle draws, so memory stays bounded; otherwise they are 
+    kept until close(), which the canvas is then fitted to. close() must be
+    called for the drawing to be complete. The turtle can be used as a 
+    context manager, which closes it.
+    
+    Many turtles, say one per stochastic variant, can draw on one canvas:
+    
+        >>> import ulsys
+        >>> from ulsys import stochastic
+        >>> rules = stochastic.production("F 0.5->F+F-F", "F 0.5->F-F+F")
+        >>> canvas = Canvas(64, 64, bounds=(-20, 0, 20, 30))
+        >>> for seed in range(10):
+        ...     symbols = stochastic.evaluateSystem("F", rules, 3, seed=seed)
+        ...     with RasterTurtle(canvas) as t:
+        ...         _ = mapActions(symbols, ulsys.kochFlake.turtleActions, t)
+        >>> int(canvas.image.max()), int((canvas.image > 0).sum())
+        (20, 261)
+    """
+    def __init__(self, canvas, pos=_vec2(0, 0), angle=math.pi/2, weight=1.0,
+                 chunkSize=1 << 16):
+        super().__init__(pos, angle)
+        self.canvas = canvas
+        self.weight = weight
+        self.chunkSize = chunkSize
+    
+    def forward(self, scale=1.0):
+        super().forward(scale)
+        if len(self.indices) >= 2 * self.chunkSize and self.canvas.bounds:
+            self.flush()
+    
+    def flush(self):
+        """Rasterizes the segments drawn so far and empties the buffers."""
+        self.canvas.draw(self.toArray(), self.weight)
+        self.vertices = array("d")
+        self.indices = array("L")
+        self._vertex = -1
+        # Saved states can't refer to vertices that are gone.
+        for i in range(3, len(self._states), 4):
+            self._states[i] = -1
+    
+    def close(self):
+        if len(self.indices):
+            self.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def _chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data + 
+            struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+def writePNG(f, image):
+    """Writes an 8 bit image to f, a binary file-like object, as a PNG. 
+    
+    image is a uint8 array of shape (height, width) for grayscale, or 
+    (height, width, 3) for RGB. Only zlib is used, no imaging library.
+    
+        >>> import io
+        >>> f = io.BytesIO()
+        >>> writePNG(f, numpy.zeros((2, 3), dtype=numpy.uint8))
+        >>> f.getvalue()[:8]
+        b'\\x89PNG\\r\\n\\x1a\\n'
+    """
+    image = numpy.asarray(image, dtype=numpy.uint8)
+    height, width = image.shape[:2]
+    colorType = 0 if image.ndim == 2 else 2
+    # Every row starts with a filter type byte, 0 for no filter.
+    rows = numpy.zeros((height, 1 + image[0].size), dtype=numpy.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+    f.write(b"\x89PNG\r\n\x1a\n")
+    f.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 
+                                        colorType, 0, 0, 0)))
+    f.write(_chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+    f.write(_chunk(b"IEND", b""))
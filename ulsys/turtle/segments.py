@@ -0,0 +1,197 @@
+"""
+ulsys vectorized turtle interpreter.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+import itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .turtle import TurtleAction, _flattenAction
+
+__all__ = [
+    "segmentArray"
+]
+
+_NOTHING, _FORWARD, _ROTATE, _PUSH, _POP = range(5)
+
+def _opcode(action):
+    name, args = action._method_name, action._args
+    if name == "forward":
+        return _FORWARD, float(args[0]) if args else 1.0
+    if name == "rotate":
+        return _ROTATE, float(args[0])
+    if name == "push":
+        return _PUSH, 0.0
+    if name == "pop":
+        return _POP, 0.0
+    return _NOTHING, 0.0
+
+def _encodeSymbols(symbols, index, default):
+    """Maps each symbol to its entry in index, or default if it has none."""
+    if isinstance(symbols, str) and all(len(s) == 1 for s in index 
+                                        if isinstance(s, str)):
+        # Strings are decoded as a whole through a code point table.
+        codes = numpy.frombuffer(symbols.encode("utf-32-le"), dtype=numpy.uint32)
+        size = max(itertools.chain((ord(s) + 1 for s in index 
+                                    if isinstance(s, str)), [1]))
+        size = max(size, int(codes.max()) + 1 if len(codes) else 0)
+        table = numpy.full(size, default, dtype=numpy.intp)
+        for s, i in index.items():
+            if isinstance(s, str):
+                table[ord(s)] = i
+        return table[codes]
+    return numpy.fromiter(map(index.get, symbols, itertools.repeat(default)),
+                          dtype=numpy.intp)
+
+def _operations(symbols, actions):
+    """Translates symbols into parallel arrays of operation kinds and 
+    values, expanding combined actions into several operations."""
+    index = dict()
+    kinds = []
+    values = []
+    starts = []
+    for s, action in actions.items():
+        index[s] = len(starts)
+        starts.append(len(kinds))
+        try:
+            parts = _flattenAction(action)
+        except TypeError:
+            parts = []
+        for a in parts:
+            kind, value = _opcode(a)
+            kinds.append(kind)
+            values.append(value)
+    starts.append(len(kinds))
+    starts = numpy.array(starts, dtype=numpy.intp)
+    lengths = numpy.diff(starts)
+    
+    keys = _encodeSymbols(symbols, index, len(index))
+    keys = keys[keys != len(index)]
+    lengths = lengths[keys]
+    offsets = numpy.cumsum(lengths) - lengths
+    gather = numpy.arange(offsets[-1] + lengths[-1] if len(keys) else 0)
+    gather += numpy.repeat(starts[keys] - offsets, lengths)
+    return (numpy.array(kinds, dtype=numpy.int8)[gather], 
+            numpy.array(values, dtype=numpy.float64)[gather])
+
+class _Branches:
+    """Matches pushes with pops, to undo what happened in a branch."""
+    def __init__(self, kinds, levels):
+        # Sorting by level keeps a level's own operations next to each other,
+        # so a difference of running sums in this order covers exactly one 
+        # branch, without the branches nested in it (which undo themselves).
+        if len(levels) and levels.max() < 1 << 15:
+            levels = levels.astype(numpy.int16)
+        self.order = numpy.argsort(levels, kind="stable")
+        sortedKinds = kinds[self.order]
+        brackets = numpy.flatnonzero(
+            (sortedKinds == _PUSH) | (sortedKinds == _POP))
+        # Within a level, pushes and pops alternate, so every pop is 
+        # preceded by its matching push.
+        i = numpy.flatnonzero(sortedKinds[brackets] == _POP)
+        self.sortedPops = brackets[i]
+        self.sortedPushes = brackets[i - 1]
+        self.pops = self.order[self.sortedPops]
+    
+    def restore(self, deltas):
+        """Returns deltas with, at each pop, the negated sum of the deltas 
+        since the matching push added in."""
+        running = numpy.cumsum(deltas[self.order])
+        result = deltas.copy()
+        result[self.pops] -= (
+            running[self.sortedPops] - running[self.sortedPushes])
+        return result
+
+def segmentArray(symbols, actions, pos=(0.0, 0.0), angle=math.pi/2):
+    """Interprets a sequence of symbols with NumPy, returning the line 
+    segments a turtle would draw.
+    
+    This is a batch alternative to mapActions(). Instead of calling an 
+    action per symbol, headings are computed as a cumulative sum of the 
+    rotations and positions as a cumulative sum of the steps. A push/pop 
+    branch is undone by adding, at the pop, the negated sum of what happened
+    at the branch's own level since the matching push.
+    
+    symbols is a sequence, actions a dictionary mapping symbol->action like 
+    for mapActions(). Only TurtleActions, and their combinations, for 
+    forward, rotate, push and pop are interpreted; other actions are ignored.
+    pos and angle are the starting state, with the same defaults as 
+    BaseTurtle.
+    
+    Returns an array of shape (N, 2, 2), where [i, 0] is the start and 
+    [i, 1] the end of segment i. Requires NumPy.
+    
+        >>> import ulsys
+        >>> segments = segmentArray("F[+F]F", {
+        ...     "F": TurtleAction.forward(),
+        ...     "+": TurtleAction.rotate(-math.pi / 2),
+        ...     "[": TurtleAction.push(),
+        ...     "]": TurtleAction.pop()})
+        >>> segments.round(6).tolist()
+        [[[0.0, 0.0], [0.0, 1.0]], [[0.0, 1.0], [1.0, 1.0]], [[0.0, 1.0], [0.0, 2.0]]]
+        >>> segmentArray(ulsys.kochFlake(3), ulsys.kochFlake.turtleActions).shape
+        (192, 2, 2)
+        >>> segmentArray("FAF", {"F": TurtleAction.forward(), 
+        ...                      "A": lambda t: None}).shape
+        (2, 2, 2)
+    """
+    if numpy is None:
+        raise ImportError("segmentArray requires NumPy")
+    kinds, values = _operations(symbols, actions)
+    
+    pushes = kinds == _PUSH
+    pops = kinds == _POP
+    depths = numpy.cumsum(pushes.astype(numpy.intp) - pops)
+    if len(depths) and depths.min() < 0:
+        raise ValueError("pop without a matching push")
+    # The level of an operation is the depth it runs at, for a push the 
+    # depth of the branch it opens and for a pop the depth it closes.
+    levels = depths + pops
+    
+    branches = _Branches(kinds, levels)
+    
+    rotations = numpy.where(kinds == _ROTATE, values, 0.0)
+    headings = angle + numpy.cumsum(branches.restore(rotations))
+    
+    forwards = kinds == _FORWARD
+    dx = numpy.zeros(len(kinds))
+    dy = numpy.zeros(len(kinds))
+    dx[forwards] = values[forwards] * numpy.cos(headings[forwards])
+    dy[forwards] = values[forwards] * numpy.sin(headings[forwards])
+    x = pos[0] + numpy.cumsum(branches.restore(dx))
+    y = pos[1] + numpy.cumsum(branches.restore(dy))
+    
+    segments = numpy.empty((numpy.count_nonzero(forwards), 2, 2))
+    segments[:, 1, 0] = x[forwards]
+    segments[:, 1, 1] = y[forwards]
+    segments[:, 0, 0] = x[forwards] - dx[forwards]
+    segments[:, 0, 1] = y[forwards] - dy[forwards]
+    return segments
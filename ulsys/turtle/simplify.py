@@ -0,0 +1,118 @@
+"""
+ulsys turtle geometry simplification.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+
+__all__ = [
+    "simplifySegments",
+    "simplifyPolylines"
+]
+
+def simplifySegments(segments, precision=6, tolerance=1e-9):
+    """Simplifies a drawing given as line segments, returning it as a list 
+    of polylines, each a list of (x, y) points.
+    
+    segments is an iterable of ((x0, y0), (x1, y1)) pairs, such as the 
+    array returned by segmentArray(). The segments are processed in order:
+    
+        Endpoints are quantized to precision decimals, and points that 
+        quantize the same are treated as the same vertex.
+        Segments of zero length are dropped, and so are segments already 
+        drawn, in either direction.
+        A segment continues the current polyline if it starts, or ends, at 
+        its last point, so no moveto is needed where a pop returns to the 
+        end of the line. Otherwise it starts a new polyline.
+        Consecutive collinear steps in the same direction are merged, 
+        tolerance being the largest sine of the angle between them that 
+        still counts as collinear.
+    
+    The result covers the same lines as the input with fewer points. 
+    Overlapping collinear segments which don't share both endpoints are not
+    detected.
+    
+        >>> simplifySegments([((0, 0), (0, 1)), ((0, 1), (0, 2)), 
+        ...                   ((0, 2), (0, 1)), ((0, 1), (1, 1)),
+        ...                   ((0, 0), (0, 1.0000001))])
+        [[(0.0, 0.0), (0.0, 2.0)], [(0.0, 1.0), (1.0, 1.0)]]
+    """
+    scale = 10 ** precision
+    # Quantized vertex -> the first point seen for it, so that polylines 
+    # share exact coordinates.
+    points = dict()
+    drawn = set()
+    lines = []
+    line = None
+    last = None
+    for a, b in segments:
+        a = (float(a[0]), float(a[1]))
+        b = (float(b[0]), float(b[1]))
+        ka = (round(a[0] * scale), round(a[1] * scale))
+        kb = (round(b[0] * scale), round(b[1] * scale))
+        if ka == kb:
+            continue
+        key = (ka, kb) if ka < kb else (kb, ka)
+        if key in drawn:
+            continue
+        drawn.add(key)
+        pa = points.setdefault(ka, a)
+        pb = points.setdefault(kb, b)
+        if kb == last:
+            ka, kb, pa, pb = kb, ka, pb, pa
+        if ka != last:
+            line = [pa, pb]
+            lines.append(line)
+        elif _collinear(line[-2], pa, pb, tolerance):
+            line[-1] = pb
+        else:
+            line.append(pb)
+        last = kb
+    return lines
+
+def _collinear(p0, p1, p2, tolerance):
+    """Tells whether p0 -> p1 -> p2 continues in the same direction."""
+    ux, uy = p1[0] - p0[0], p1[1] - p0[1]
+    vx, vy = p2[0] - p1[0], p2[1] - p1[1]
+    cross = ux * vy - uy * vx
+    dot = ux * vx + uy * vy
+    return dot > 0 and abs(cross) <= tolerance * math.hypot(ux, uy) * math.hypot(vx, vy)
+
+def simplifyPolylines(polylines, precision=6, tolerance=1e-9):
+    """Like simplifySegments(), but takes the drawing as polylines, such as
+    those yielded by ArrayTurtle.polylines().
+    
+        >>> import ulsys
+        >>> from ulsys.turtle import ArrayTurtle, mapActions
+        >>> t = mapActions(ulsys.pythagorasTree(5), 
+        ...                ulsys.pythagorasTree.turtleActions, ArrayTurtle())
+        >>> len(t), sum(len(line) - 1 for line in simplifyPolylines(t.polylines()))
+        (112, 63)
+    """
+    return simplifySegments(
+        ((line[i], line[i + 1]) for line in polylines 
+                                for i in range(len(line) - 1)),
+        precision, tolerance)
@@ -0,0 +1,178 @@
+"""
+ulsys spatial index over turtle segments.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = [
+    "SegmentGrid",
+    "segmentBounds",
+    "cullSegments"
+]
+
+def segmentBounds(segments):
+    """Returns the extents (xmin, ymin, xmax, ymax) of segments, an array of 
+    shape (N, 2, 2) like the one returned by segmentArray(). Requires 
+    NumPy."""
+    points = numpy.asarray(segments, dtype=numpy.float64).reshape(-1, 2)
+    if not len(points):
+        raise ValueError("no segments")
+    xmin, ymin = points.min(axis=0).tolist()
+    xmax, ymax = points.max(axis=0).tolist()
+    return xmin, ymin, xmax, ymax
+
+def _intersecting(segments, rect):
+    """Tells, for each segment, whether it intersects the rectangle rect, 
+    given as (xmin, ymin, xmax, ymax)."""
+    xmin, ymin, xmax, ymax = rect
+    x0, y0 = segments[:, 0, 0], segments[:, 0, 1]
+    x1, y1 = segments[:, 1, 0], segments[:, 1, 1]
+    overlap = ((numpy.minimum(x0, x1) <= xmax) & (numpy.maximum(x0, x1) >= xmin) &
+               (numpy.minimum(y0, y1) <= ymax) & (numpy.maximum(y0, y1) >= ymin))
+    # With overlapping bounding boxes, the segment misses the rectangle only
+    # if all four corners are strictly on the same side of its line.
+    dx = x1 - x0
+    dy = y1 - y0
+    sides = [dx * (cy - y0) - dy * (cx - x0) 
+             for cx, cy in ((xmin, ymin), (xmin, ymax), (xmax, ymin), (xmax, ymax))]
+    above = (sides[0] > 0) & (sides[1] > 0) & (sides[2] > 0) & (sides[3] > 0)
+    below = (sides[0] < 0) & (sides[1] < 0) & (sides[2] < 0) & (sides[3] < 0)
+    return overlap & ~above & ~below
+
+def cullSegments(segments, rect):
+    """Returns the segments that intersect the rectangle rect, given as 
+    (xmin, ymin, xmax, ymax), by testing every one of them. Use a 
+    SegmentGrid to query the same segments many times. Requires NumPy.
+    
+        >>> cullSegments([((0, 0), (2, 2)), ((3, 0), (4, 0))], (1, 0, 3, 1)).tolist()
+        [[[0.0, 0.0], [2.0, 2.0]], [[3.0, 0.0], [4.0, 0.0]]]
+        >>> len(cullSegments([((0, 0), (2, 2))], (1.5, 0, 3, 1)))
+        0
+    """
+    segments = numpy.asarray(segments, dtype=numpy.float64).reshape(-1, 2, 2)
+    return segments[_intersecting(segments, rect)]
+
+class SegmentGrid:
+    """A uniform grid index over line segments, for viewport queries.
+    
+    The extents of segments, an array of shape (N, 2, 2) like the one 
+    returned by segmentArray(), are divided into square cells of side 
+    cellSize, by default chosen to give about one cell per segment. Every 
+    segment is listed in the cells its bounding box covers, the lists being
+    stored back to back in one array sorted by cell, so the index is built
+    with a handful of NumPy operations. A query gathers the segments listed
+    in the cells the rectangle covers and tests them exactly.
+    
+    bounds is the extents of the segments as (xmin, ymin, xmax, ymax), all 
+    zero if there are none. Requires NumPy.
+    
+        >>> import ulsys
+        >>> from ulsys.turtle import segmentArray
+        >>> segments = segmentArray(ulsys.kochFlake(5), ulsys.kochFlake.turtleActions)
+        >>> grid = SegmentGrid(segments)
+        >>> tuple(round(x) for x in grid.bounds)
+        (-210, 0, 70, 243)
+        >>> view = (-20, 0, 20, 40)
+        >>> hits = grid.query(view)
+        >>> len(hits), len(cullSegments(segments, view))
+        (176, 176)
+    """
+    def __init__(self, segments, cellSize=None):
+        if numpy is None:
+            raise ImportError("SegmentGrid requires NumPy")
+        self.segments = numpy.asarray(
+            segments, dtype=numpy.float64).reshape(-1, 2, 2)
+        if len(self.segments):
+            self.bounds = segmentBounds(self.segments)
+        else:
+            self.bounds = (0.0, 0.0, 0.0, 0.0)
+        xmin, ymin, xmax, ymax = self.bounds
+        if cellSize is None:
+            # About one cell per segment, but no more than a row or column 
+            # of them for drawings that are flat or straight.
+            width, height = xmax - xmin, ymax - ymin
+            count = max(len(self.segments), 1)
+            cellSize = max(math.sqrt(width * height / count), 
+                           max(width, height) / count) or 1.0
+        elif cellSize <= 0:
+            raise ValueError("cellSize must be positive")
+        self.cellSize = cellSize
+        self.columns = int((xmax - xmin) // cellSize) + 1
+        self.rows = int((ymax - ymin) // cellSize) + 1
+        
+        lower = self._cell(self.segments.min(axis=1))
+        upper = self._cell(self.segments.max(axis=1))
+        spans = upper - lower + 1
+        counts = spans[:, 0] * spans[:, 1]
+        # Each segment is repeated once per cell it covers; k numbers the 
+        # covered cells of a segment row by row.
+        owners = numpy.repeat(numpy.arange(len(self.segments)), counts)
+        k = numpy.arange(len(owners)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        columns = lower[owners, 0] + k % spans[owners, 0]
+        rows = lower[owners, 1] + k // spans[owners, 0]
+        cells = rows * self.columns + columns
+        order = numpy.argsort(cells, kind="stable")
+        # The segments listed in cell c are members[starts[c]:starts[c + 1]].
+        self.members = owners[order]
+        self.starts = numpy.zeros(self.rows * self.columns + 1, dtype=numpy.intp)
+        numpy.cumsum(numpy.bincount(cells, minlength=self.rows * self.columns), 
+                     out=self.starts[1:])
+    
+    def __len__(self):
+        return len(self.segments)
+    
+    def _cell(self, points):
+        """Returns the (column, row) of the cells holding points, clamped to
+        the grid."""
+        origin = numpy.array(self.bounds[:2])
+        cells = numpy.floor((points - origin) / self.cellSize).astype(numpy.intp)
+        return numpy.clip(cells, 0, [self.columns - 1, self.rows - 1])
+    
+    def query(self, rect):
+        """Returns the sorted indices of the segments that intersect the 
+        rectangle rect, given as (xmin, ymin, xmax, ymax)."""
+        xmin, ymin, xmax, ymax = rect
+        bx0, by0, bx1, by1 = self.bounds
+        if xmin > bx1 or xmax < bx0 or ymin > by1 or ymax < by0:
+            return numpy.empty(0, dtype=numpy.intp)
+        (c0, r0), (c1, r1) = self._cell(numpy.array([[xmin, ymin], [xmax, ymax]]))
+        rows = numpy.arange(r0, r1 + 1) * self.columns
+        starts = self.starts[rows + c0]
+        stops = self.starts[rows + c1 + 1]
+        candidates = numpy.unique(numpy.concatenate(
+            [self.members[a:b] for a, b in zip(starts.tolist(), stops.tolist())]))
+        return candidates[_intersecting(self.segments[candidates], rect)]
+    
+    def visible(self, rect):
+        """Returns the segments that intersect the rectangle rect, as an 
+        array of shape (N, 2, 2), for culling before export."""
+        return self.segments[self.query(rect)]
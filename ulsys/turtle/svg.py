@@ -0,0 +1,193 @@
+"""
+ulsys streaming SVG turtle.
+
+License follows
+-------------------------------------------------------------------------------
+The MIT License (MIT)
+
+Copyright (c) 2015 Simon Otter
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import io
+import math
+from array import array
+
+from .turtle import BaseTurtle, TurtleAction, mapActions, _vec2
+
+__all__ = [
+    "SVGTurtle"
+]
+
+_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<svg xmlns="http://www.w3.org/2000/svg" version="1.1"{viewBox}>\n'
+    '<path fill="none" stroke="black" stroke-width="{linewidth}" '
+    'stroke-linejoin="round" stroke-linecap="round" d="')
+_FOOTER = '"/>\n</svg>\n'
+# Room left in the header for the viewBox, filled in by close().
+_VIEWBOX_SPACE = 96
+
+def _viewBoxAttribute(viewBox):
+    return ' viewBox="{:.6g} {:.6g} {:.6g} {:.6g}"'.format(*viewBox)
+
+class SVGTurtle(BaseTurtle):
+    """A turtle that streams its drawing to a file as SVG path data.
+    
+    Nothing but the current state and a small buffer is kept in memory: 
+    moves are formatted into the buffer, which is written to f whenever it 
+    holds more than chunkSize characters. The bounding box is updated as the
+    turtle moves, and close() writes the end of the document and patches the
+    viewBox into the header. Patching requires f to be seekable and not 
+    opened in append mode; otherwise the SVG has no viewBox, unless it is 
+    given up front as viewBox, a tuple (x, y, width, height) in SVG 
+    coordinates, where y points down. Like ArrayTurtle, the turtle keeps its
+    position as plain floats and its saved states in an array('d'), so a 
+    step allocates nothing but the formatted text.
+    
+    f is a text or binary file-like object. The turtle can be used as a 
+    context manager, which closes it (but not f).
+    
+        >>> f = io.StringIO()
+        >>> with SVGTurtle(f, linewidth=0.1, precision=2) as t:
+        ...     _ = mapActions("F[+F]F", {
+        ...         "F": TurtleAction.forward(),
+        ...         "+": TurtleAction.rotate(-math.pi / 2),
+        ...         "[": TurtleAction.push(),
+        ...         "]": TurtleAction.pop()}, t)
+        >>> f.getvalue().split('d="')[1]
+        'M0.00 0.00L0.00 -1.00L1.00 -1.00M0.00 -1.00L0.00 -2.00"/>\\n</svg>\\n'
+        >>> import re
+        >>> re.search('viewBox="([^"]*)"', f.getvalue()).group(1)
+        '-0.1 -2.1 1.2 2.2'
+    """
+    def __init__(self, f, pos=_vec2(0, 0), angle=math.pi/2, linewidth=0.15, 
+                 precision=4, chunkSize=1 << 16, viewBox=None):
+        self.x = float(pos.x)
+        self.y = float(pos.y)
+        self.angle = angle
+        self.f = f
+        self.linewidth = linewidth
+        self.chunkSize = chunkSize
+        self._states = array("d")
+        self.closed = False
+        self._binary = not isinstance(f, io.TextIOBase)
+        self._moveto = "M%.{0}f %.{0}f".format(precision)
+        self._lineto = "L%.{0}f %.{0}f".format(precision)
+        self._buffer = []
+        self._buffered = 0
+        self.xmin = self.xmax = self.x
+        self.ymin = self.ymax = self.y
+        
+        try:
+            seekable = f.seekable()
+        except AttributeError:
+            seekable = False
+        # In append mode every write goes to the end, whatever seek() says.
+        mode = getattr(f, "mode", "")
+        if isinstance(mode, str) and "a" in mode:
+            seekable = False
+        self._viewBoxAt = None
+        if viewBox is not None:
+            header = _HEADER.format(viewBox=_viewBoxAttribute(viewBox),
+                                    linewidth=linewidth)
+        elif seekable:
+            self._viewBoxAt = f.tell()
+            header = _HEADER.format(viewBox=" " * _VIEWBOX_SPACE, 
+                                    linewidth=linewidth)
+        else:
+            header = _HEADER.format(viewBox="", linewidth=linewidth)
+        self._write(header)
+        self._emit(self._moveto % (pos.x, -pos.y))
+    
+    @property
+    def pos(self):
+        return _vec2(self.x, self.y)
+    
+    @pos.setter
+    def pos(self, pos):
+        self.x = float(pos.x)
+        self.y = float(pos.y)
+    
+    def _write(self, text):
+        self.f.write(text.encode("utf-8") if self._binary else text)
+    
+    def _emit(self, text):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered > self.chunkSize:
+            self.flush()
+    
+    def flush(self):
+        """Writes the buffered path data to f."""
+        self._write("".join(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+    
+    def forward(self, scale=1.0):
+        x = self.x = self.x + math.cos(self.angle) * scale
+        y = self.y = self.y + math.sin(self.angle) * scale
+        if x < self.xmin:
+            self.xmin = x
+        elif x > self.xmax:
+            self.xmax = x
+        if y < self.ymin:
+            self.ymin = y
+        elif y > self.ymax:
+            self.ymax = y
+        self._emit(self._lineto % (x, -y))
+    
+    def rotate(self, rad):
+        self.angle += rad
+    
+    def push(self):
+        self._states.extend((self.x, self.y, self.angle))
+    
+    def pop(self):
+        self.x, self.y, self.angle = self._states[-3:]
+        del self._states[-3:]
+        self._emit(self._moveto % (self.x, -self.y))
+    
+    def viewBox(self):
+        """Returns the viewBox of the drawing so far as (x, y, width, height)
+        in SVG coordinates, with room for the line width."""
+        w = self.linewidth
+        return (self.xmin - w, -self.ymax - w, 
+                self.xmax - self.xmin + 2*w, self.ymax - self.ymin + 2*w)
+    
+    def close(self):
+        """Writes the rest of the document and patches in the viewBox."""
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self._write(_FOOTER)
+        if self._viewBoxAt is not None:
+            end = self.f.tell()
+            attribute = _viewBoxAttribute(self.viewBox())
+            self.f.seek(self._viewBoxAt + _HEADER.index("{viewBox}"))
+            self._write(attribute.ljust(_VIEWBOX_SPACE))
+            self.f.seek(end)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
@@ -30,14 +30,16 @@ SOFTWARE.
 __all__ = [
     "mapActions",
     "BaseTurtle",
-    "TurtleAction",
-    "PyXTurtle"
+    "TurtleAction"
 ]
 
 import math
+import time
 from abc import ABC, abstractmethod
 
 class _vec2:
+    __slots__ = ("x", "y")
+    
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -48,17 +50,21 @@ class _vec2:
     def __mul__(self, a):
         return _vec2(self.x * float(a), self.y * float(a))
         
-def mapActions(symbols, actions, turtle):
+def mapActions(symbols, actions, turtle, stats=None):
     """Takes a sequence of symbols and maps them to actions.
     
     symbols is a sequence.
     actions is a dictionary mapping symbol->action
     turtle is an implementation of the turtle interface.
+    stats is an optional ulsys.stats.TurtleStats, or any object with the same
+    action() method, which is told about every action taken.
     
     Non mapped symbols are ignored (they do not generate an error!)
     
     An action is a function object f: turtle -> None.
     """
+    if stats is not None:
+        return _mapActionsWithStats(symbols, actions, turtle, stats)
     for s in symbols:
         # Todo: Maybe warn if not in actions?
         if s in actions:
@@ -66,6 +72,30 @@ def mapActions(symbols, actions, turtle):
             f(turtle)
     return turtle
 
+def _mapActionsWithStats(symbols, actions, turtle, stats):
+    # For each symbol: the name of its action, the number of forward steps 
+    # and the change in push/pop depth.
+    described = dict()
+    clock = time.perf_counter
+    for s in symbols:
+        if s in actions:
+            f = actions[s]
+            if s not in described:
+                described[s] = _describeAction(f)
+            name, segments, depthChange = described[s]
+            start = clock()
+            f(turtle)
+            stats.action(name, clock() - start, segments, depthChange)
+    return turtle
+
+def _describeAction(action):
+    try:
+        parts = [a._method_name for a in _flattenAction(action)]
+    except TypeError:
+        return getattr(action, "__name__", type(action).__name__), 0, 0
+    return ("+".join(parts), parts.count("forward"), 
+            parts.count("push") - parts.count("pop"))
+
 class BaseTurtle(ABC):
     """An abstract turtle interface. This represents the bare minimum interface
     for a turtle object.
@@ -127,40 +157,15 @@ class TurtleAction:
         def do_combined_action(turtle):
             a(turtle)
             b(turtle)
+        do_combined_action.actions = (a, b)
         return do_combined_action
 
-try:
-    from pyx import *
-    
-    class PyXTurtle(BaseTurtle):
-        def __init__(self):
-            super().__init__()
-            self.paths = []
-            self.states = []
-            self.paths.append(path.moveto(0, 0))
-            self.circles = []
-        
-        def forward(self, scale=1.0):
-            super().forward(scale)
-            self.paths.append(path.lineto(self.pos.x, self.pos.y))
-        
-        def rotate(self, rad):
-            super().rotate(rad)
-        
-        def push(self):
-            self.states.append((self.pos, self.angle))
-        
-        def linewidth(self, width):
-            path.moveto(0,0) #IMPLEMENT
-        
-        def pop(self):
-            pos, angle = self.states.pop()
-            self.pos = pos
-            self.angle = angle
-            self.paths.append(path.moveto(pos.x, pos.y))
-        
-        def circle(self, r):
-            self.circles.append(path.circle(self.pos.x, self.pos.y, r))
-            
-except ImportError:
-    pass
\ No newline at end of file
+def _flattenAction(action):
+    """Lists the TurtleActions that make up action, looking into combined 
+    actions. Raises TypeError for any other kind of callable, since it can't
+    be inspected."""
+    if isinstance(action, TurtleAction):
+        return [action]
+    if hasattr(action, "actions"):
+        return [x for a in action.actions for x in _flattenAction(a)]
+    raise TypeError("can't inspect action {!r}".format(action))